@@ -1,65 +1,192 @@
-from os.path import expanduser
+from collections import deque
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from os.path import expanduser, join
 
-from devicehub_doc.doc import Doc
+from devicehub_doc.cache import SectionCache, fingerprint, source_fingerprint
+from devicehub_doc.doc import Doc, FieldCache
+from devicehub_doc.model import CONFIG_KEYS, EmptyError, Endpoint, ModelBuilder, Resource
+from devicehub_doc.profiling import NULL_PROFILER
+from devicehub_doc.writer import write_atomic
 
 
-class ApiToRST(Doc):
+class ApiToRST(ModelBuilder):
     """
     Generates a RST file compatible with `sphinxcontrib.httpdomain`.
+
+    The document is streamed resource by resource to `output`, a path (by default `~/api.rst`) that
+    is replaced atomically, or a file object.
+
+    Pass a `cache_dir` to keep the section of every resource there: following runs only render again
+    the resources whose settings, schema or config have changed.
+
+    Pass a number of `workers` to render the resources concurrently in a thread pool, or in a process pool
+    if `processes` is set, in which case the settings and schemas need to be picklable. The output is
+    the same as rendering them one after the other.
+
+    The resources are built as in :class:`devicehub_doc.model.Model`, or taken from the `model` of the app
+    if passed, so it is only formatted.
+
+    Pass a :class:`devicehub_doc.profiling.Profiler` as `profiler` to record the time and output of every
+    resource and method; its report is saved after writing the document if the profiler has a path.
     """
+    CONFIG_KEYS = CONFIG_KEYS
+    """The keys of the app config that are used to render a resource."""
 
-    def __init__(self, app):
-        self.doc = 'API\n===\n'
+    def __init__(self, app, cache_dir: str = None, output=None, workers: int = None, processes=False, naming=None,
+                 profiler=None, model=None):
+        super().__init__(naming, profiler)
         self.config = app.config
-        self.filename = 'api.rst'
-        resource_settings = app.config['DOMAIN']
-        for key in sorted(resource_settings):
-            self.doc += self.document_resource(resource_settings[key])
+        self.model = model
+        self.workers = workers
+        self.processes = processes
+        self.output = output if output is not None else join(expanduser('~'), 'api.rst')
+        self.cache = None
+        if cache_dir is not None:
+            self.cache = SectionCache(cache_dir)
+            self.source_fingerprint = source_fingerprint(type(self))
         self.write()
 
     def write(self):
-        with open(expanduser('~') + '/' + self.filename, '+w') as out:
-            out.write(self.doc)
+        self.profiler.count('bytes written', write_atomic(self.iter_doc(), self.output))
+        if self.cache is not None:
+            self.cache.save()
+            print('API sections: {} rendered, {} cached.'.format(self.cache.misses, self.cache.hits))
         print("API doc written.")
+        if self.profiler.path is not None:
+            self.profiler.save()
 
-    def document_resource(self, settings: dict):
-        one_successful = False
-        type_name = settings['_schema'].type_name()
-        doc = '{}\n--------------------\n'.format(type_name)
-        for method in settings['resource_methods']:
-            try:
-                doc += self.document_endpoint(settings, method, True)
-            except EmptyError:
-                pass
-            else:
-                one_successful = True
-        for method in settings['item_methods']:
-            try:
-                doc += self.document_endpoint(settings, method, False)
-            except EmptyError:
-                pass
-            else:
-                one_successful = True
-        if type_name == 'Account':
-            settings['url'] = 'login'
-            doc += self.document_endpoint(settings, 'POST', True)
-        if not one_successful:
-            return ''
+    def iter_doc(self):
+        """
+        Yields the chunks of the document, in order.
+        """
+        yield 'API\n===\n'
+        resource_settings = self.config['DOMAIN']
+        if self.workers is None:
+            for key in sorted(resource_settings):
+                yield from self.render_resource(key, resource_settings[key])
         else:
-            return doc
+            yield from self.render_concurrently(sorted(resource_settings), resource_settings)
 
-    def document_endpoint(self, settings: dict, method: str, resource):
-        item_url = '/({}:_id)'.format(settings.get('item_url', 'string')) if not resource else ''
-        database = '(string:database)/' if method != 'login' else ''
+    def render_concurrently(self, keys: list, resource_settings: dict):
+        """
+        Renders the resources in a pool of `workers` and yields their sections in the order of `keys`.
+        At most two sections per worker are pending at the same time.
+        """
+        pool = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+        with pool(self.workers) as executor:
+            pending = deque()
+            for key in keys:
+                pending.append(self.submit_resource(executor, key, resource_settings[key]))
+                if len(pending) >= 2 * self.workers:
+                    yield pending.popleft()()
+            while pending:
+                yield pending.popleft()()
+
+    def submit_resource(self, executor, key: str, settings: dict):
+        """
+        Submits the rendering of the resource to `executor` if the cache does not have it.
+        :return: A function returning the section of the resource.
+        """
+        if self.cache is None:
+            return executor.submit(self.document_resource, key, settings).result
+        schema = settings['_schema'](False)
+        resource_fingerprint = self.fingerprint_resource(settings, schema)
+        section = self.cache.lookup(key, resource_fingerprint)
+        if section is not None:
+            return lambda: section
+        future = executor.submit(self.document_resource, key, settings, schema)
+        return lambda: self.cache.store(key, resource_fingerprint, future.result())
+
+    def __getstate__(self):
+        # Worker processes only get what rendering a resource needs: they do not write, nor use the model
+        config = {key: self.config.get(key) for key in self.CONFIG_KEYS}
+        state = dict(self.__dict__, config=config, cache=None, profiler=NULL_PROFILER, output=None, model=None)
+        del state['field_cache']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.field_cache = FieldCache()
+
+    def render_resource(self, key: str, settings: dict):
+        """
+        Returns the chunks of :func:`iter_resource`, taking them from the cache if the fingerprint of the
+        resource has not changed.
+        """
+        if self.cache is None:
+            return self.iter_resource(self.get_resource(key, settings))
+        schema = settings['_schema'](False)
+        resource_fingerprint = self.fingerprint_resource(settings, schema)
+        section = self.cache.get(key, resource_fingerprint, lambda: self.document_resource(key, settings, schema))
+        return section,
+
+    def fingerprint_resource(self, settings: dict, schema: dict) -> str:
+        """
+        Returns the fingerprint of everything :func:`document_resource` uses to render the resource,
+        including the code of this generator and what the naming renders for its schema.
+        """
+        config = {key: self.config.get(key) for key in self.CONFIG_KEYS}
+        return fingerprint(self.source_fingerprint, config, settings, schema, self.get_naming(schema))
+
+    def get_naming(self, schema: dict) -> dict:
+        """
+        Returns the key of the write roles, and the type names of the references and the names of the unit
+        codes of the schema, as the naming renders them. They change with DeviceHub and not with the schema.
+        """
+        naming = self.naming
+        types, units = {}, {}
+        stack = list(schema.values())  # Inner schemas with a type name are not traversed, as in Doc.get_dict
+        while stack:
+            value = stack.pop()
+            if isinstance(value, Mapping) and not hasattr(value, 'type_name'):
+                if 'data_relation' in value:
+                    resource = value['data_relation']['resource']
+                    types[resource] = naming.type(resource)
+                if 'unitCode' in value:
+                    units[value['unitCode']] = naming.humanize_unit(value['unitCode'])
+                stack.extend(value.values())
+            elif isinstance(value, (list, tuple)):
+                stack.extend(value)
+        return {'write_roles': naming.write_roles, 'types': types, 'units': units}
+
+    def document_resource(self, key: str, settings: dict, schema: dict = None) -> str:
+        return ''.join(self.iter_resource(self.get_resource(key, settings, schema)))
+
+    def get_resource(self, key: str, settings: dict, schema: dict = None) -> Resource:
+        """
+        Returns the resource from the model, building it if there is no model.
+        """
+        if self.model is not None:
+            return self.model.resources[key]
+        return self.build_resource(key, settings, schema)
+
+    def iter_resource(self, resource: Resource):
+        """
+        Yields the title and the endpoints of the resource. Nothing is yielded if no endpoint has fields.
+        """
+        if not resource.endpoints:
+            return
+        yield '{}\n--------------------\n'.format(resource.type_name)
+        for endpoint in resource.endpoints:
+            yield self.document_endpoint(resource, endpoint)
+        if resource.type_name == 'Account':
+            yield self.document_endpoint(resource, Endpoint('POST', True, ()), login=True)
+
+    def document_endpoint(self, resource: Resource, endpoint: Endpoint, login=False):
+        method = endpoint.method
+        url = 'login' if login else resource.url
+        item_url = '/({}:_id)'.format(resource.item_url) if not endpoint.collection else ''
+        database = '(string:database)/'
         space = '   '
         doc = [
-            '.. http:{}:: {}\n\n'.format(method.lower(), database + settings['url'] + item_url),
+            '.. http:{}:: {}\n\n'.format(method.lower(), database + url + item_url),
             '',
         ]
-        if 'additional_lookup' in settings and not resource:
-            lookup = settings['additional_lookup']
+        if resource.additional_lookup is not None and not endpoint.collection:
+            lookup = resource.additional_lookup
             doc.append(
-                space + ' {}: {}/*({}:{})*'.format('Additional Lookup', database + settings['url'], lookup['url'],
+                space + ' {}: {}/*({}:{})*'.format('Additional Lookup', database + url, lookup['url'],
                                                    lookup['field']))
             doc.append('')
 
@@ -78,7 +205,7 @@ class ApiToRST(Doc):
             space + ':statuscode 415:',
             space + ':statuscode 500: Any non-documented error. Please, report if you get this code.'
         ])
-        if settings.get('url') != 'login':
+        if not login:
             doc.extend([
                 space + ':reqheader Authorization: "Basic" + space + token from *POST /login*',
             ])
@@ -88,7 +215,7 @@ class ApiToRST(Doc):
                 doc.append(space + ':statuscode 204:')
             else:
                 doc.append(space + ':statuscode 200:')
-            if not resource:
+            if not endpoint.collection:
                 doc.extend([
                     space + ':resheader Cache-Control: max-age={}, must-revalidate'.format(self.config['ITEM_CACHE']),
                     space + ':resheader Last-Modified: The date when the resource was modified',
@@ -98,7 +225,7 @@ class ApiToRST(Doc):
                 doc.extend([
                     space + ':resheader Cache-Control: max-age=1, must-revalidate'
                 ])
-            doc.append(self.get_resource_schema(settings, settings['_schema'](False), method, resource))
+            doc.append(self.get_resource_schema(resource, endpoint))
         else:
             doc.extend([
                 space + ':<json string email: The email of the account.',
@@ -111,38 +238,29 @@ class ApiToRST(Doc):
                 space + ':>json list databases:',
                 space + ':>json string defaultDatabase:'
             ])
-        # doc += '\n' + tabulate(self.fields(settings['_schema'](), method), headers='keys', tablefmt='rst')
         return '\n'.join(doc) + '\n\n'
 
-    def get_resource_schema(self, settings, schema, method, resource):
+    def get_resource_schema(self, resource: Resource, endpoint: Endpoint) -> str:
         """
-        Gets all the fields from the Schema, interesting for the point of view of the resource
-        :param settings:
-        :param schema:
-        :param method:
-        :param resource:
-        :raises EmptyError: When there are no regular fields in the Schema
-        :return:
+        Formats the fields of the endpoint, with the ones python-eve adds, sorted by sink.
         """
-        fields = []
-        schema_name = settings['_schema'].type_name()
+        method, collection = endpoint.method, endpoint.collection
         space = '   '
-        json_type = 'jsonarr' if resource and method == 'GET' else 'json'
+        json_type = 'jsonarr' if collection and method == 'GET' else 'json'
+        chevron = '<' if method == 'POST' else '>'
+        fields = self.get_formatted_fields(endpoint.fields, resource.type_name, method,
+                                           space + ':{}{} '.format(chevron, json_type))
         if method != 'DELETE' and method != 'PATCH':
-            chevron = '<' if method == 'POST' else '>'
-            fields.extend(
-                self.get_formatted_fields(schema, method=method, space=space, chevron=chevron, schema_name=schema_name,
-                                          settings=settings, json_type=json_type))
             # Special fields
             prefix = space + ':>{} {} {}:'
-            if '_id' not in schema:
+            if not resource.declares_id:
                 fields.append((prefix.format(json_type, 'string', self.config['ID_FIELD']), 10))
             fields.append((prefix.format(json_type, 'datetime', self.config['LAST_UPDATED']), -10))
             fields.append((prefix.format(json_type, 'datetime', self.config['DATE_CREATED']), -10))
 
         # Special fields for GET resource
         prefix = space + ':>json {} {}: {}'
-        if method == 'GET' and resource:
+        if method == 'GET' and collection:
             fields.extend([
                 (prefix.format('list', '_items', 'Contains the actual data, *Response JSON Array of Objects*.'), -10),
                 (prefix.format('dict', '_meta', 'Provides pagination data.'), -10),
@@ -159,64 +277,25 @@ class ApiToRST(Doc):
                            -10))
 
         # Extra response fields
-        if (method == 'POST' or method == 'PATCH') and 'extra_response_fields' in settings:
-            for field_name in settings['extra_response_fields']:
-                try:
-                    fields.extend(self.get_formatted_field(field_name, schema[field_name], space=space, chevron='>',
-                                                       schema_name=schema_name, settings=settings, method=method,
-                                                       json_type=json_type))
-                except EmptyError:
-                    pass
+        fields.extend(self.get_formatted_fields(endpoint.extra_fields, resource.type_name, method,
+                                                space + ':>{} '.format(json_type)))
         # Sorting and final preparation
-        fields.sort(key=Doc.get_sink, reverse=True)
+        with self.profiler.time('sorting', resource.type_name, method):
+            fields.sort(key=Doc.get_sink, reverse=True)
         fields.append(space + ':<json object {}: See "Meta" for more information.'.format(self.config['META']))
         return '\n'.join([elem[0] for elem in fields])
 
-    def get_formatted_fields(self, schema: dict, **options) -> list:
+    def get_formatted_fields(self, fields: tuple, scope: str, method: str, prefix: str) -> list:
         """
-        Gets all the formatted fields
-        :raises EmptyError: If no fields
         :return: list of (formatted_field, sink)
         """
-        fields = []
-        for field_name, inner_schema in schema.items():
-            try:
-                fields.extend(self.get_formatted_field(field_name, inner_schema, **options))
-            except EmptyError:
-                pass
-        if len(fields) == 0:
-            raise EmptyError()
-        return fields
-
-    def get_formatted_field(self, field_name, schema, **options) -> list:
-        prefix = options['space'] + ':{}{} '.format(options['chevron'], options['json_type'])
-        fields = self.get_field(field_name, schema, **options)
         formatted_fields = []
-        for field in fields:
-            required = '\*' if field['attr'].pop('Required') else ''
-            field_type = '{}->{}'.format(field['type'], field['reference']) if 'reference' in field else field['type']
-            sink = field['attr'].pop('Sink')
-            attr = ['{}: {}'.format(name, value) for name, value in field['attr'].items() if value is not None]
-            formatted_field = prefix + '{} {}{}: '.format(field_type, required, field['name']) + ', '.join(attr)
-            formatted_fields.append((formatted_field, sink))
+        with self.profiler.time('formatting', scope, method):
+            for field in fields:
+                required = '\*' if field.required else ''
+                field_type = '{}->{}'.format(field.type, field.reference) if field.reference is not None else field.type
+                attr = ['{}: {}'.format(name, value) for name, value in field.attrs()
+                        if value is not None and name != 'Required' and name != 'Sink']
+                formatted_field = prefix + '{} {}{}: '.format(field_type, required, field.name) + ', '.join(attr)
+                formatted_fields.append((formatted_field, field.sink))
         return formatted_fields
-
-    def get_field(self, field_name, schema, **options) -> list:
-        method = options.get('method')
-        if not (schema.get('readonly', False) and (method == 'POST' or method == 'PATCH' or method == 'PUT')) \
-                and not (schema.get('writeonly', False) and method == 'GET') \
-                and not (not schema.get('modifiable', True) and (method == 'PATCH' or method == 'PUT')):
-            # Removing fields that are not projected
-            if method == 'GET':
-                try:
-                    if not options['settings']['datasource']['projection'][field_name]:
-                        raise EmptyError()
-                except KeyError:
-                    pass
-            return super().get_field(field_name, schema, **options)
-        else:
-            raise EmptyError()
-
-
-class EmptyError(Exception):
-    pass
@@ -0,0 +1,116 @@
+"""
+    Benchmarks of the generators on synthetic apps (:mod:`devicehub_doc.synthetic`), so regressions show
+    up as the schemas grow. Run `devicehub-doc bench --help` for the parameters.
+
+    Every benchmark is run on a fresh generator and measured twice: once for wall time, taking the best of
+    `repeat` runs, and once under :mod:`tracemalloc` for peak memory, as tracing slows the code down.
+    Graphviz is not run; the diagram benchmark only generates the DOT sources.
+"""
+import io
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from contextlib import redirect_stdout
+from itertools import product
+from time import perf_counter
+
+from devicehub_doc.synthetic import SyntheticApp
+
+
+class Discard:
+    """A text file object that forgets what is written to it."""
+    @staticmethod
+    def write(text: str) -> int:
+        return len(text)
+
+
+def bench_api(app: SyntheticApp):
+    from devicehub_doc.api_rst import ApiToRST
+    ApiToRST(app, output=Discard(), naming=app.naming)
+
+
+def bench_get_fields(app: SyntheticApp):
+    from devicehub_doc.doc import Doc
+    doc = Doc(app.naming)
+    for settings in app.config['DOMAIN'].values():
+        schema = settings['_schema']
+        doc.get_fields(schema(False), schema_name=schema.type_name())
+
+
+def bench_diagram(app: SyntheticApp):
+    from devicehub_doc.class_diagram import ClassDiagram
+    with tempfile.TemporaryDirectory() as directory:
+        ClassDiagram(rdfs=app.rdfs, naming=app.naming, directory=directory, render=False)
+
+
+def bench_all(app: SyntheticApp):
+    from devicehub_doc.api_rst import ApiToRST
+    from devicehub_doc.class_diagram import ClassDiagram
+    from devicehub_doc.hierarchy import ClassIndex
+    from devicehub_doc.markdown import ApiToMarkdown
+    from devicehub_doc.model import Model
+    from devicehub_doc.openapi import ApiToOpenAPI
+    model = Model.from_app(app, ClassIndex.from_rdfs(app.rdfs), app.naming)
+    ApiToRST(app, output=Discard(), naming=app.naming, model=model)
+    ApiToOpenAPI(model, Discard())
+    ApiToMarkdown(model, Discard())
+    with tempfile.TemporaryDirectory() as directory:
+        ClassDiagram(naming=app.naming, directory=directory, render=False, model=model)
+
+
+BENCHMARKS = (
+    ('ApiToRST', bench_api),
+    ('Doc.get_fields', bench_get_fields),
+    ('ClassDiagram DOT', bench_diagram),
+    ('All emitters', bench_all),
+)
+
+
+def measure(benchmark, app: SyntheticApp, repeat: int) -> tuple:
+    """
+    :return: The best wall time in seconds and the peak of memory allocated in bytes.
+    """
+    with redirect_stdout(io.StringIO()):
+        seconds = float('inf')
+        for _ in range(repeat):
+            start = perf_counter()
+            benchmark(app)
+            seconds = min(seconds, perf_counter() - start)
+        tracemalloc.start()
+        try:
+            benchmark(app)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return seconds, peak
+
+
+def run(resources=(10, 100), fields=(20,), depth=(2,), enum_size=(10,), repeat=3, names=None, out=sys.stdout):
+    """
+    Runs the benchmarks for every combination of the parameters of :class:`SyntheticApp`, printing
+    a row per benchmark.
+    :return: The results, as a list of dictionaries.
+    """
+    results = []
+    row = '{:>9} {:>6} {:>5} {:>9}  {:<18} {:>10} {:>11}'
+    print(row.format('resources', 'fields', 'depth', 'enum size', 'benchmark', 'time (s)', 'peak (KiB)'), file=out)
+    for parameters in product(resources, fields, depth, enum_size):
+        app = SyntheticApp(*parameters)
+        for name, benchmark in BENCHMARKS:
+            if names and name not in names:
+                continue
+            seconds, peak = measure(benchmark, app, repeat)
+            print(row.format(*parameters, name, '{:.3f}'.format(seconds), peak // 1024), file=out)
+            results.append(dict(zip(('resources', 'fields', 'depth', 'enum_size'), parameters),
+                                benchmark=name, seconds=seconds, peak_bytes=peak))
+    return results
+
+
+def main(args):
+    results = run(args.resources, args.fields, args.depth, args.enum_size, args.repeat, args.benchmark)
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump(results, file, indent=2)
+        print('Benchmark results written in {}.'.format(os.path.abspath(args.json)))
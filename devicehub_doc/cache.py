@@ -0,0 +1,181 @@
+"""
+    On-disk caches that let the generators skip work whose inputs have not changed.
+
+    Inputs are identified by :func:`fingerprint`, a stable content hash that does not depend on
+    the process, so cached results can be reused between runs.
+"""
+import hashlib
+import json
+import os
+import shutil
+from collections.abc import Mapping
+from inspect import getsourcefile, isclass, isroutine
+from threading import Lock
+from urllib.parse import quote
+
+
+def fingerprint(*objs) -> str:
+    """
+    Returns a stable hash of the content of the passed-in objects.
+
+    Mappings are hashed regardless of their order, classes and functions by their qualified name,
+    and other objects by their representation, or only by their type when the representation
+    contains a memory address.
+    """
+    digest = hashlib.sha1()
+    for obj in objs:
+        _feed(digest.update, obj)
+    return digest.hexdigest()
+
+
+def _feed(update, obj):
+    if isinstance(obj, (str, int, float, bool)) or obj is None:
+        update(repr(obj).encode())
+    elif isinstance(obj, Mapping):
+        update('{}{{'.format(type(obj).__qualname__).encode())
+        for key in sorted(obj, key=repr):
+            _feed(update, key)
+            update(b':')
+            _feed(update, obj[key])
+            update(b',')
+        update(b'}')
+    elif isinstance(obj, (list, tuple)):
+        update(b'[')
+        for value in obj:
+            _feed(update, value)
+            update(b',')
+        update(b']')
+    elif isinstance(obj, (set, frozenset)):
+        update(b'(')
+        for value in sorted(fingerprint(value) for value in obj):
+            update(value.encode())
+        update(b')')
+    elif isclass(obj) or isroutine(obj):
+        update('<{}.{}>'.format(getattr(obj, '__module__', ''), getattr(obj, '__qualname__', '')).encode())
+    else:
+        representation = repr(obj)
+        if ' at 0x' in representation:
+            representation = '<{}.{}>'.format(type(obj).__module__, type(obj).__qualname__)
+        update(representation.encode())
+
+
+def source_fingerprint(cls: type) -> str:
+    """
+    Returns a hash of the source files defining `cls` and its bases, so cached results are
+    invalidated when the code generating them changes.
+    """
+    digest = hashlib.sha1()
+    for path in sorted({getsourcefile(c) for c in cls.__mro__ if c.__module__ != 'builtins'}):
+        with open(path, 'rb') as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+
+class SectionCache:
+    """
+    Stores rendered text sections in `directory`, each one identified by a key and the fingerprint of
+    the inputs it was rendered from.
+
+    Call :func:`save` after a run to persist the index and remove the sections that were not used.
+    """
+    INDEX = 'index.json'
+
+    def __init__(self, directory: str, suffix='.rst'):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.suffix = suffix
+        try:
+            with open(os.path.join(directory, self.INDEX)) as file:
+                self.index = json.load(file)
+        except (OSError, ValueError):
+            self.index = {}
+        self.used = set()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, fingerprint: str, render) -> str:
+        """
+        Returns the section of `key` if it was rendered from inputs with the same fingerprint,
+        otherwise calls `render` and stores its result.
+        """
+        section = self.lookup(key, fingerprint)
+        if section is None:
+            section = self.store(key, fingerprint, render())
+        return section
+
+    def lookup(self, key: str, fingerprint: str):
+        """
+        Returns the section of `key` if it was rendered from inputs with the same fingerprint, or None.
+        """
+        self.used.add(key)
+        if self.index.get(key) == fingerprint:
+            try:
+                with open(self.path(key)) as file:
+                    section = file.read()
+            except OSError:
+                pass
+            else:
+                self.hits += 1
+                return section
+        return None
+
+    def store(self, key: str, fingerprint: str, section: str) -> str:
+        """
+        Stores the section of `key` rendered from inputs with the passed-in fingerprint, and returns it.
+        """
+        self.used.add(key)
+        self.misses += 1
+        path = self.path(key)
+        with open(path + '.tmp', 'w') as file:
+            file.write(section)
+        os.replace(path + '.tmp', path)
+        self.index[key] = fingerprint
+        return section
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, quote(key, safe='') + self.suffix)
+
+    def save(self):
+        for key in set(self.index) - self.used:
+            del self.index[key]
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+        with open(os.path.join(self.directory, self.INDEX), 'w') as file:
+            json.dump(self.index, file, indent=0, sort_keys=True)
+
+
+class RenderCache:
+    """
+    Stores the artifacts rendered by Graphviz in `directory`, identified by the fingerprint of their
+    DOT source, layout engine and format, so unchanged graphs are copied into place instead of laid out again.
+
+    The cache can be used by several threads rendering at the same time.
+    """
+    def __init__(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def render(self, source: str, engine: str, img_format: str, filepath: str, render) -> str:
+        """
+        Places the artifact of the DOT source at `filepath`.`img_format`, calling `render` to generate it there
+        if the cache does not have it.
+        :return: The path of the artifact.
+        """
+        output = '{}.{}'.format(filepath, img_format)
+        cached = os.path.join(self.directory, '{}.{}'.format(fingerprint(source, engine, img_format), img_format))
+        if os.path.exists(cached):
+            shutil.copyfile(cached, output)
+            with self._lock:
+                self.hits += 1
+            return output
+        render()
+        shutil.copyfile(output, cached + '.tmp')
+        os.replace(cached + '.tmp', cached)
+        with self._lock:
+            self.misses += 1
+        return output
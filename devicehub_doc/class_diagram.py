@@ -3,32 +3,112 @@
 
     To use this module, install 'graphviz' through pip and just execute the class: Graphviz()
     You can add 2 parameters, the location of the file and the type.
+
+    Graphviz and the schemas of DeviceHub are imported when a diagram is generated, not with this module.
 """
-from ereuse_devicehub.resources.account.settings import Account
-from ereuse_devicehub.resources.device.benchmark_settings import Benchmark
-from ereuse_devicehub.resources.device.component.settings import Component
-from ereuse_devicehub.resources.device.schema import Product
-from ereuse_devicehub.resources.place.settings import Place
-from graphviz import Digraph
+import os
+from importlib import import_module
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+
 from os.path import expanduser
-from ereuse_devicehub.resources.event.settings import Event, EventWithOneDevice, EventWithDevices
-from ereuse_devicehub.resources.schema import RDFS
 
+from devicehub_doc.cache import RenderCache
 from devicehub_doc.doc import Doc
+from devicehub_doc.hierarchy import ClassIndex, Partition
+from devicehub_doc.model import ClassNode, ModelBuilder
+
+SCHEMA_MODULES = (
+    'ereuse_devicehub.resources.account.settings',
+    'ereuse_devicehub.resources.device.benchmark_settings',
+    'ereuse_devicehub.resources.device.component.settings',
+    'ereuse_devicehub.resources.device.schema',
+    'ereuse_devicehub.resources.place.settings',
+    'ereuse_devicehub.resources.event.settings',
+)
+"""Modules defining the classes of the diagram, imported so they are subclasses of RDFS."""
+
+PARTITIONS = (
+    Partition('products', ('Product',), (), 'dot', True),
+    Partition('components', ('Component',), (), 'neato', False),
+    Partition('events with one device', ('EventWithOneDevice',), ('Event',), 'dot', True),
+    Partition('events with devices', ('EventWithDevices',), ('Event',), 'neato', False),
+    Partition('place, account and benchmark', ('Place', 'Benchmark', 'Account'), (), 'dot', True),
+)
+"""The default groups of the divided diagram, in the order they are generated."""
 
 
-class ClassDiagram(Doc):
+def devicehub_index() -> ClassIndex:
+    """
+    Returns the index of the RDFS hierarchy of DeviceHub, importing :data:`SCHEMA_MODULES` first.
+    """
+    for module in SCHEMA_MODULES:
+        import_module(module)
+    from ereuse_devicehub.resources.schema import RDFS
+    return ClassIndex.from_rdfs(RDFS)
+
+
+class ClassDiagram(ModelBuilder):
     """
     Generates a class diagram for DeviceHub classes, using graphviz.
 
     the parameter `divide` of the initialization toggles the two ways of obtaining the diagram:
     - A big, full diagram.
-    - Divided by different parts, so it is easily embeddable to documents.
+    - Divided by different parts, so it is easily embeddable to documents. The parts are set by `partitions`,
+      a list of :class:`devicehub_doc.hierarchy.Partition`. Pass the names of some of them as `only` to
+      generate just those, and the classes they show.
+
+    Fields with `allowed` values are typed as an enum node listing them. Enums are interned by their values:
+    every graph has one node per different enum, linked from the classes using it, and enums of different
+    values get different names. Only the first `max_enum_values` values are listed.
+
+    Pass a `max_size` instead to divide the diagram automatically (see :func:`ClassIndex.split`) in diagrams
+    of about that many nodes and edges at most, laid out with dot. Classes in other diagrams that are
+    referenced or extended are drawn as dashed stub nodes naming the diagram they are in.
+
+    `img_format` is a format or a list of formats, all of them rendered from the same DOT source.
+    The graphs are rendered concurrently in a pool of `workers` threads, one per CPU by default.
+
+    Pass a `cache_dir` to keep the rendered graphs there: Graphviz is not run again for graphs whose
+    DOT source, engine and format have not changed.
+
+    The DOT sources are written in `directory`, the home by default. With `render` False they are not
+    rendered; call :func:`render` to do it.
+
+    `rdfs` is the root of the class hierarchy, by default the RDFS of DeviceHub after importing
+    :data:`SCHEMA_MODULES`. Pass instead an `index` of the hierarchy, as the one of
+    :class:`devicehub_doc.snapshot.Snapshot`, to use it without importing anything, or a
+    :class:`devicehub_doc.model.Model` with classes as `model`, whose classes are only formatted.
+    `naming` and `profiler` are passed to :class:`devicehub_doc.doc.Doc`.
+    The report of the profiler is saved at the end if it has a path.
     """
-    def __init__(self, divide=True, img_format='pdf', file_prefix='devicehub diagram'):
-        self.img_format = img_format
-        self.directory = expanduser('~')
+    def __init__(self, divide=True, img_format='pdf', file_prefix='devicehub diagram', workers: int = None,
+                 partitions=PARTITIONS, cache_dir: str = None, rdfs=None, naming=None, directory: str = None,
+                 render=True, profiler=None, index: ClassIndex = None, model=None, only=None,
+                 max_size: int = None, max_enum_values=30):
+        from graphviz import Digraph
+        super().__init__(naming, profiler)
+        self.img_formats = (img_format,) if isinstance(img_format, str) else tuple(img_format)
+        self.directory = directory if directory is not None else expanduser('~')
         self.file_prefix = file_prefix
+        self.workers = workers
+        self.renders = []
+        self.cache = RenderCache(cache_dir) if cache_dir is not None else None
+        self.model = model
+        self.classes = {}
+        self.stubs = None
+        self.max_enum_values = max_enum_values
+        self.enums = {}  # Values: name
+        self.enum_names = {}  # Name used by enums from field name: times
+        self.linked_enums = {}  # Group name: (class, enum) linked
+        if model is not None:
+            index = model.index
+        elif index is None:
+            index = ClassIndex.from_rdfs(rdfs) if rdfs is not None else devicehub_index()
+        self.index = index
+        if divide and max_size is not None:
+            partitions = self.split(max_size)
+            self.stubs = {partition.name: set() for partition in partitions}
         g = Digraph()
         options = {
             'nodesep': '0.2',
@@ -45,93 +125,176 @@ class ClassDiagram(Doc):
         options_edge = {
             'len': '0.2'
         }
-        classes = Digraph(graph_attr=options)
-        products = Digraph(graph_attr=options)
-        components = Digraph(engine='neato', graph_attr=options_neato, edge_attr=options_edge)
-        events_with_one_device = Digraph(graph_attr=options)
-        events_with_devices = Digraph(engine='neato', graph_attr=options_neato, edge_attr=options_edge)
-        others = Digraph(graph_attr=options)
+        classes = Digraph(graph_attr=options)  # RDFS, Thing...
+        groups = {}
+        for partition in partitions:
+            if partition.engine == 'neato':
+                groups[partition.name] = Digraph(engine='neato', graph_attr=options_neato, edge_attr=options_edge)
+            else:
+                groups[partition.name] = Digraph(engine=partition.engine, graph_attr=options)
         if divide:
-            for graph in (products, events_with_one_device, others, events_with_devices, components):
+            for graph in groups.values():
                 self.initialize_graph(graph)
         else:
             self.initialize_graph(g)
-        self.generate_class(RDFS, classes)
-        product_subclasses = Product.subclasses() + [Product]
-        event_with_one_device_subclasses = EventWithOneDevice.subclasses() + [Event, EventWithOneDevice]
-        event_with_devices_subclasses = EventWithDevices.subclasses() + [Event, EventWithDevices]
-        other_subclasses = Place.subclasses() + Benchmark.subclasses() + Account.subclasses() + [Place, Benchmark, Account]
-        components_subclasses = Component.subclasses() + [Component]
-        for subclass in RDFS.subclasses():
-            if subclass in components_subclasses:
-                self.generate_class(subclass, components)
-            elif subclass in product_subclasses:
-                self.generate_class(subclass, products)
-            elif subclass in event_with_one_device_subclasses:
-                self.generate_class(subclass, events_with_one_device)
-            elif subclass in event_with_devices_subclasses:
-                self.generate_class(subclass, events_with_devices)
-            elif subclass in other_subclasses:
-                self.generate_class(subclass, others)
-            else:  # RDFS, Thing
-                self.generate_class(subclass, classes)
+        self.groups = index.partition(partitions)
+        if divide and only is not None:
+            partitions = [partition for partition in partitions if partition.name in only]
+        shown = {partition.name for partition in partitions}
+        if not divide or any(partition.base_classes for partition in partitions):
+            shown.add(None)
+        for name in index.names:
+            group = self.groups[name]
+            if group in shown:
+                self.generate_class(name, groups[group] if group is not None else classes)
         if divide:
-            for graph, name in ((products, 'products'), (components, 'components'), (events_with_one_device, 'events with one device'), (events_with_devices, 'events with devices'), (others, 'place, account and benchmark')):
-                if name == 'components' or name == 'events with devices':
-                    self.generate_graph(graph, (), name)
-                else:
-                    self.generate_graph(graph, (classes,), name)
+            for partition in partitions:
+                self.generate_graph(groups[partition.name], (classes,) if partition.base_classes else (),
+                                    partition.name)
         else:
-            self.generate_graph(g, (events_with_one_device, products, classes, others,), 'general')
+            sub_graphs = tuple(groups[partition.name] for partition in partitions if partition.base_classes)
+            self.generate_graph(g, sub_graphs + (classes,), 'general')
+        if render:
+            self.render()
+        if self.profiler.path is not None:
+            self.profiler.save()
 
-    def generate_graph(self, graph: Digraph, sub_graphs: tuple, name):
-        graph.format = self.img_format
-        graph.directory = self.directory
+    def generate_graph(self, graph: 'Digraph', sub_graphs: tuple, name):
+        """
+        Writes the DOT source of the graph, leaving its rendering in every format for :func:`render`.
+        """
         for sub_graph in sub_graphs:
             graph.subgraph(sub_graph)
-        graph.render('{} {}'.format(self.file_prefix, name), None, False)
-        print('Class diagram {} written.'.format(name))
+        filepath = graph.save('{} {}'.format(self.file_prefix, name), self.directory)
+        self.renders.extend((name, graph.engine, img_format, filepath, graph.source)
+                            for img_format in self.img_formats)
+
+    def render(self):
+        """
+        Renders the written graphs. Every render is a Graphviz subprocess, so they are run by threads.
+        """
+        workers = self.workers or min(len(self.renders), os.cpu_count() or 1) or 1
+        with ThreadPoolExecutor(workers) as executor:
+            timings = executor.map(self.render_graph, self.renders)
+            for (name, _, img_format, *_), seconds in zip(self.renders, timings):
+                print('Class diagram {} written as {} in {:.2f}s.'.format(name, img_format, seconds))
+        self.renders = []
+        if self.cache is not None:
+            print('Class diagram renders: {} rendered, {} cached.'.format(self.cache.misses, self.cache.hits))
+
+    def render_graph(self, render: tuple) -> float:
+        """
+        Renders a graph from its DOT source with :func:`graphviz.render`, or takes it from the cache.
+        :return: The seconds it took.
+        """
+        import graphviz
+        name, engine, img_format, filepath, source = render
+        start = perf_counter()
+        with self.profiler.time('rendering', name, img_format):
+            if self.cache is None:
+                graphviz.render(engine, img_format, filepath)
+            else:
+                self.cache.render(source, engine, img_format, filepath,
+                                  lambda: graphviz.render(engine, img_format, filepath))
+        return perf_counter() - start
 
     @staticmethod
-    def initialize_graph(graph: Digraph):
+    def initialize_graph(graph: 'Digraph'):
         graph.attr('node', shape='record')
 
-    def generate_class(self, cls, group):
-        RDFS._import_schemas = False
-        schema = cls.actual_fields()
-        if cls != RDFS:
-            del schema['@type']
-        name = cls.type_name()
-        group.node(name, '{{{}|{}}}'.format(name, '\l'.join(self.get_formatted_fields(name, schema, group))))
-        try:
-            super_class = cls.superclasses(1)[1]
-            group.edge(super_class.type_name(), name, arrowtail='empty', arrowhead='none', dir='both')
-        except AttributeError:
-            pass
-
-    def get_formatted_fields(self, type_name: str, schema: dict, group: Digraph) -> list:
+    def split(self, max_size: int) -> list:
+        """
+        Returns the partitions of :func:`ClassIndex.split`, counting as the size of a class its node,
+        and twice its references, its enums and the edge to its parent, as their ends can be stubs or
+        enum nodes.
+        """
+        sizes, references = {}, {}
+        for name in self.index.names:
+            node = self.classes[name] = self.get_class(name)
+            references[name] = [field.reference for field in node.fields if field.reference is not None]
+            enums = sum(1 for field in node.fields if field.reference is None and field.allowed)
+            sizes[name] = 1 + 2 * ((node.parent is not None) + len(references[name]) + enums)
+        return self.index.split(references, max_size, sizes)
+
+    def get_class(self, name: str, scope: str = None) -> ClassNode:
+        if self.model is not None:
+            return self.model.classes[name]
+        node = self.classes.get(name)
+        if node is None:
+            node = self.build_class(self.index, name, scope)
+        return node
+
+    def generate_class(self, name: str, group):
+        scope = self.groups[name] or 'base classes'
+        node = self.get_class(name, scope)
+        group.node(name, '{{{}|{}}}'.format(name, '\l'.join(self.get_formatted_fields(node, group, scope))))
+        if node.parent is not None:
+            self.add_stub(group, scope, node.parent)
+            group.edge(node.parent, name, arrowtail='empty', arrowhead='none', dir='both')
+
+    def link_enum(self, group: 'Digraph', group_name: str, type_name: str, field_name: str, allowed) -> str:
+        """
+        Links the class to the enum of the values, declaring it in the graph the first time.
+        :return: The name of the enum, after the first field with its values.
+        """
+        values = tuple(map(str, allowed))
+        enum_name = self.enums.get(values)
+        if enum_name is None:
+            enum_name = '{}Enum'.format(field_name)
+            times = self.enum_names[enum_name] = self.enum_names.get(enum_name, 0) + 1
+            if times > 1:
+                enum_name += str(times)
+            self.enums[values] = enum_name
+        linked = self.linked_enums.setdefault(group_name, set())
+        if enum_name not in linked:
+            linked.add(enum_name)
+            shown = values
+            if self.max_enum_values is not None and len(values) > self.max_enum_values:
+                shown = values[:self.max_enum_values] + ('... {} more'.format(len(values) - self.max_enum_values),)
+            group.node(enum_name, '{{{}\lEnum|{}}}'.format(enum_name, '\l'.join(shown)))
+            self.profiler.count('enum nodes', 1, group_name)
+        if (type_name, enum_name) not in linked:
+            linked.add((type_name, enum_name))
+            group.edge(type_name, enum_name, style='dashed', arrowhead='open')
+        return enum_name
+
+    def add_stub(self, group: 'Digraph', group_name: str, name: str):
+        """
+        Draws the class `name` as a stub if the diagram is divided automatically and the class is in
+        another diagram.
+        """
+        if self.stubs is None or self.groups.get(name) == group_name or name in self.stubs[group_name]:
+            return
+        self.stubs[group_name].add(name)
+        where = 'in {}'.format(self.groups[name]) if self.groups.get(name) is not None else 'not drawn'
+        group.node(name, '{{{}|{}}}'.format(name, where), style='dashed')
+
+    def get_formatted_fields(self, node: ClassNode, group: 'Digraph', scope: str) -> list:
         resulting_fields = []
-        for field in self.get_fields(schema, schema_name=type_name):
-            name = field['name']
-            if 'reference' in field:
-                if field['type'] == 'list':
-                    head_label = '*' if field['attr']['Required'] else '1..*'
-                else:
-                    head_label = '1' if field['attr']['Required'] else '0..1'
-                group.edge(type_name, field['reference'], headlabel=head_label, taillabel='*', label=field['name'])
-            else:
-                field['name'] = '*' + name if field['attr']['Unique'] else name
-                resulting_field = '+ {}'.format(field['name'])
-                if len(field['attr']['Allowed'] or []) > 0:
-                    enum_name = '{}Enum'.format(name)
-                    group.node(enum_name, '{{{}Enum\lEnum|{}}}'.format(name, '\l'.join(map(str, field['attr']['Allowed']))))
-                    resulting_field += ': {}'.format(enum_name)
+        type_name = node.name
+        with self.profiler.time('formatting', scope):
+            for field in node.fields:
+                name = field.name
+                required = field.required
+                if field.reference is not None:
+                    if field.type == 'list':
+                        head_label = '*' if required else '1..*'
+                    else:
+                        head_label = '1' if required else '0..1'
+                    self.add_stub(group, scope, field.reference)
+                    group.edge(type_name, field.reference, headlabel=head_label, taillabel='*', label=name)
                 else:
-                    resulting_field += ': {}'.format(field['type'])
-                resulting_field += ' [0..1]' if not field['attr']['Required'] else ''
-                resulting_field += ' (write-only)' if field['attr']['Write only'] else ''
-                resulting_field += ' (read-only)' if field['attr']['Read only'] else ''
-                resulting_fields.append((resulting_field, field['attr']['Sink']))
-        resulting_fields.sort(key=Doc.get_sink, reverse=True)
+                    resulting_field = '+ {}'.format('*' + name if field.unique else name)
+                    allowed = field.allowed
+                    if len(allowed or []) > 0:
+                        resulting_field += ': {}'.format(self.link_enum(group, scope, type_name, name, allowed))
+                    else:
+                        resulting_field += ': {}'.format(field.type)
+                    resulting_field += ' [0..1]' if not required else ''
+                    resulting_field += ' (write-only)' if field.write_only else ''
+                    resulting_field += ' (read-only)' if field.read_only else ''
+                    resulting_fields.append((resulting_field, field.sink))
+        with self.profiler.time('sorting', scope):
+            resulting_fields.sort(key=Doc.get_sink, reverse=True)
         return [resulting_field[0] for resulting_field in resulting_fields]
 
@@ -0,0 +1,249 @@
+"""
+    The `devicehub-doc` command, with the subcommands `api`, that writes the RST of the API,
+    `diagram`, that renders the class diagrams, `all`, that writes the API as RST, OpenAPI and Markdown
+    and renders the diagrams from one traversal of the schemas, `watch`, that updates `api.rst` and the
+    diagrams while the schemas are edited, `snapshot`, that exports what they need
+    from DeviceHub so they can run from it without DeviceHub, `diff`, that writes the changelog of the API
+    between two snapshots or apps, and `bench`, that benchmarks them on synthetic apps.
+
+    DeviceHub and Graphviz are only imported by the subcommand that uses them, so `--help` and
+    argument errors are immediate. Every subcommand reports how long the startup, the imports and the
+    generation took, in stderr.
+"""
+import argparse
+import sys
+from importlib import import_module
+from os.path import expanduser, isfile, join
+from time import perf_counter
+
+START = perf_counter()
+
+
+def load_app(spec: str):
+    """
+    Returns the app referenced by `spec`, as `module:attribute`. If the attribute is a class or a factory
+    instead of an app, it is called to get the app.
+    """
+    module_name, _, attribute = spec.partition(':')
+    app = getattr(import_module(module_name), attribute or 'app')
+    if not hasattr(app, 'config') and callable(app):
+        app = app()
+    return app
+
+
+def api(args):
+    from devicehub_doc.api_rst import ApiToRST
+    if args.snapshot is not None:
+        from devicehub_doc.snapshot import Snapshot
+        app = Snapshot.load(args.snapshot)
+        naming = app.naming
+    else:
+        app, naming = load_app(args.app), None
+    imported = perf_counter()
+    ApiToRST(app, cache_dir=args.cache_dir, output=args.output, workers=args.workers, processes=args.processes,
+             naming=naming, profiler=get_profiler(args))
+    return imported
+
+
+def diagram(args):
+    from devicehub_doc.class_diagram import SCHEMA_MODULES, ClassDiagram
+    index = naming = None
+    if args.snapshot is not None:
+        from devicehub_doc.snapshot import Snapshot
+        import_module('graphviz')
+        snapshot = Snapshot.load(args.snapshot)
+        index, naming = snapshot.index, snapshot.naming
+    else:
+        for module in ('graphviz',) + SCHEMA_MODULES:
+            import_module(module)
+    imported = perf_counter()
+    ClassDiagram(divide=not args.whole, img_format=args.format or ['pdf'], file_prefix=args.prefix,
+                 workers=args.workers, cache_dir=args.cache_dir, naming=naming, profiler=get_profiler(args),
+                 index=index, max_size=args.max_size, max_enum_values=args.max_enum_values)
+    return imported
+
+
+def all_docs(args):
+    from devicehub_doc.api_rst import ApiToRST
+    from devicehub_doc.class_diagram import ClassDiagram, devicehub_index
+    from devicehub_doc.markdown import ApiToMarkdown
+    from devicehub_doc.model import Model
+    from devicehub_doc.openapi import ApiToOpenAPI
+    import_module('graphviz')
+    if args.snapshot is not None:
+        from devicehub_doc.snapshot import Snapshot
+        app = Snapshot.load(args.snapshot)
+        index, naming = app.index, app.naming
+    else:
+        app, index, naming = load_app(args.app), devicehub_index(), None
+    imported = perf_counter()
+    directory = args.directory or expanduser('~')
+    profiler = get_profiler(args)
+    model = Model.from_app(app, index, naming, profiler)
+    ApiToRST(app, output=join(directory, 'api.rst'), naming=naming, model=model)
+    ApiToOpenAPI(model, join(directory, 'api.json'))
+    ApiToMarkdown(model, join(directory, 'api.md'))
+    ClassDiagram(divide=not args.whole, img_format=args.format or ['pdf'], file_prefix=args.prefix,
+                 workers=args.workers, cache_dir=args.cache_dir, naming=naming, directory=directory,
+                 profiler=profiler, model=model, max_size=args.max_size, max_enum_values=args.max_enum_values)
+    return imported
+
+
+def watch(args):
+    from devicehub_doc.watch import Watcher
+    import_module('graphviz')
+    app = load_app(args.app)
+    imported = perf_counter()
+    Watcher(app, directory=args.directory, img_format=args.format or ['pdf'], file_prefix=args.prefix,
+            workers=args.workers, cache_dir=args.cache_dir, max_enum_values=args.max_enum_values,
+            interval=args.interval).watch()
+    return imported
+
+
+def snapshot(args):
+    from devicehub_doc.snapshot import Snapshot
+    app = load_app(args.app)
+    imported = perf_counter()
+    Snapshot.from_app(app).save(args.path)
+    return imported
+
+
+def diff(args):
+    from devicehub_doc.diff import diff, diff_snapshots, format_changes
+    from devicehub_doc.snapshot import Snapshot
+    if isfile(args.old) and isfile(args.new):
+        imported = perf_counter()
+        changes = diff_snapshots(args.old, args.new)
+    else:
+        # Apps are exported first so both versions are compared in the same terms
+        old, new = (Snapshot.load(spec) if isfile(spec) else Snapshot.from_app(load_app(spec))
+                    for spec in (args.old, args.new))
+        imported = perf_counter()
+        changes = diff(old, new, old.naming, new.naming)
+    changelog = format_changes(changes)
+    if args.output is None:
+        print(changelog, end='')
+    else:
+        with open(args.output, 'w') as file:
+            file.write(changelog)
+        print('Changelog written.')
+    return imported
+
+
+def get_profiler(args):
+    if args.profile is None:
+        return None
+    from devicehub_doc.profiling import Profiler
+    return Profiler(args.profile)
+
+
+def bench(args):
+    from devicehub_doc import benchmark
+    imported = perf_counter()
+    benchmark.main(args)
+    return imported
+
+
+def get_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='devicehub-doc', description='Generates the documentation of DeviceHub.')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    # Options shared by several subcommands, defined once
+    app_options = argparse.ArgumentParser(add_help=False)
+    app_options.add_argument('--app', default='ereuse_devicehub.flaskapp:DeviceHub',
+                             help='The app as module:attribute; classes and factories are called. '
+                                  'Default: %(default)s.')
+    snapshot_options = argparse.ArgumentParser(add_help=False)
+    snapshot_options.add_argument('--snapshot', metavar='PATH', help='Read DeviceHub from this snapshot instead of '
+                                                                     'importing it.')
+    directory_options = argparse.ArgumentParser(add_help=False)
+    directory_options.add_argument('-d', '--directory', help='Where to write everything. '
+                                                             'Default: the home directory.')
+    profile_options = argparse.ArgumentParser(add_help=False)
+    profile_options.add_argument('--profile', metavar='PATH', help='Write a JSON report of the time and output '
+                                                                   'of every resource, method and group.')
+    diagram_options = argparse.ArgumentParser(add_help=False)
+    diagram_options.add_argument('-f', '--format', action='append',
+                                 help='A format of the diagrams, as pdf or svg. Repeat it to get several. '
+                                      'Default: pdf.')
+    diagram_options.add_argument('--prefix', default='devicehub diagram', help='Default: %(default)s.')
+    diagram_options.add_argument('-j', '--workers', type=int, help='Graphviz processes rendering at the same time.')
+    diagram_options.add_argument('--cache-dir', help='Keep the rendered diagrams there and reuse the unchanged '
+                                                     'ones.')
+    diagram_options.add_argument('--max-enum-values', type=int, default=30, help='Values listed by an enum. '
+                                                                                 'Default: %(default)s.')
+    division_options = argparse.ArgumentParser(add_help=False)
+    division_options.add_argument('--whole', action='store_true', help='Render one diagram instead of dividing it.')
+    division_options.add_argument('--max-size', type=int, help='Divide the diagram automatically in diagrams of '
+                                                               'this many nodes and edges at most, instead of by '
+                                                               'groups.')
+
+    api_parser = subparsers.add_parser('api', parents=[app_options, snapshot_options, profile_options],
+                                       help='Writes the API as RST for sphinxcontrib.httpdomain.')
+    api_parser.add_argument('-o', '--output', help='The RST file to write. Default: ~/api.rst.')
+    api_parser.add_argument('--cache-dir', help='Keep the sections there and only render the changed resources.')
+    api_parser.add_argument('-j', '--workers', type=int, help='Render the resources concurrently.')
+    api_parser.add_argument('--processes', action='store_true', help='Use processes instead of threads.')
+    api_parser.set_defaults(run=api)
+
+    diagram_parser = subparsers.add_parser('diagram', parents=[snapshot_options, diagram_options, division_options,
+                                                               profile_options],
+                                           help='Renders the class diagrams in the home directory.')
+    diagram_parser.set_defaults(run=diagram)
+
+    all_parser = subparsers.add_parser('all', parents=[app_options, snapshot_options, directory_options,
+                                                       diagram_options, division_options, profile_options],
+                                       help='Writes api.rst, api.json (OpenAPI) and api.md and renders the '
+                                            'divided class diagrams, traversing the schemas once.')
+    all_parser.set_defaults(run=all_docs)
+
+    watch_parser = subparsers.add_parser('watch', parents=[app_options, directory_options, diagram_options],
+                                         help='Writes api.rst and the divided class diagrams, and updates them '
+                                              'when the schemas of DeviceHub change.')
+    watch_parser.add_argument('--interval', type=float, default=0.2, help='Seconds between checks of the files. '
+                                                                          'Default: %(default)s.')
+    watch_parser.set_defaults(run=watch)
+
+    snapshot_parser = subparsers.add_parser('snapshot', parents=[app_options],
+                                            help='Exports the DOMAIN and the classes of DeviceHub, for --snapshot.')
+    snapshot_parser.add_argument('path', help='The file to write, gzipped if it ends in .gz.')
+    snapshot_parser.set_defaults(run=snapshot)
+
+    diff_parser = subparsers.add_parser('diff', help='Writes the changes of the API between two versions, '
+                                                     'as a Markdown changelog.')
+    diff_parser.add_argument('old', help='The old version: a snapshot, or an app as module:attribute.')
+    diff_parser.add_argument('new', help='The new version: a snapshot, or an app as module:attribute.')
+    diff_parser.add_argument('-o', '--output', help='The Markdown file to write. Default: the standard output.')
+    diff_parser.set_defaults(run=diff)
+
+    bench_parser = subparsers.add_parser('bench', help='Benchmarks the generators on synthetic apps, '
+                                                       'for every combination of the sizes.')
+    bench_parser.add_argument('--resources', type=int, nargs='+', default=[10, 100], help='Default: %(default)s.')
+    bench_parser.add_argument('--fields', type=int, nargs='+', default=[20], help='Fields per schema. '
+                                                                                  'Default: %(default)s.')
+    bench_parser.add_argument('--depth', type=int, nargs='+', default=[2], help='Nesting of dict and list '
+                                                                                'subschemas. Default: %(default)s.')
+    bench_parser.add_argument('--enum-size', type=int, nargs='+', default=[10], help='Values of the allowed '
+                                                                                     'enums. Default: %(default)s.')
+    bench_parser.add_argument('--repeat', type=int, default=3, help='Runs timed to take the best. '
+                                                                    'Default: %(default)s.')
+    bench_parser.add_argument('--benchmark', action='append', choices=['ApiToRST', 'Doc.get_fields',
+                                                                       'ClassDiagram DOT', 'All emitters'],
+                              help='Run only this benchmark. Repeat it to run several. Default: all.')
+    bench_parser.add_argument('--json', help='Write the results to this JSON file too.')
+    bench_parser.set_defaults(run=bench)
+    return parser
+
+
+def main(argv=None):
+    args = get_parser().parse_args(argv)
+    started = perf_counter()
+    imported = args.run(args)
+    end = perf_counter()
+    print('Startup {:.0f} ms, imports {:.0f} ms, generation {:.0f} ms.'.format(
+        (started - START) * 1000, (imported - started) * 1000, (end - imported) * 1000), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,164 @@
+"""
+    Structural diff of the API of two versions of DeviceHub, to write changelogs:
+
+        changes = diff_snapshots('old.jsonl.gz', 'new.jsonl.gz')
+        print(format_changes(changes))
+
+    Every resource, endpoint and field of the model (:mod:`devicehub_doc.model`) is summarized by a digest
+    of its subtree, so the unchanged ones are skipped by comparing digests. Resources whose settings and
+    schema are unchanged are not even built: their snapshot lines, or fingerprints for apps, are compared
+    first, so the work is proportional to the changes.
+"""
+from collections import namedtuple
+
+from devicehub_doc.cache import fingerprint
+from devicehub_doc.model import ModelBuilder
+
+Change = namedtuple('Change', 'resource endpoint field attribute action old new')
+"""
+A difference between the old and the new API:
+- resource: the key of the resource.
+- endpoint: the endpoint, as 'METHOD url' with the new url, or None if the change is of the resource.
+- field: the name of the field, or None if the change is of the endpoint or resource.
+- attribute: the label of the attribute that changed, as 'Required', or None if the field was added
+  or removed.
+- action: 'added', 'removed' or 'changed'.
+- old, new: the old and new values of the attribute, or the types of an added or removed field.
+"""
+
+
+class Digest:
+    """
+    The digest of a resource and its subtree: :attr:`value` is the digest of the whole resource,
+    and :attr:`endpoints` has, by method and whether it is of the collection, the digest of the endpoint and
+    the digest and attributes of its fields by name. Endpoints are not keyed by url so changing it is one change.
+    """
+    __slots__ = 'value', 'attributes', 'endpoints'
+
+    def __init__(self, resource):
+        self.attributes = {'URL': resource.url, 'Item URL': resource.item_url,
+                           'Additional lookup': resource.additional_lookup}
+        self.endpoints = {}
+        for endpoint in resource.endpoints:
+            fields = {}
+            for kind, endpoint_fields in (('', endpoint.fields), (' (extra response field)', endpoint.extra_fields)):
+                for field in endpoint_fields:
+                    attributes = {'Type': field.type, 'Reference': field.reference}
+                    attributes.update(field.attrs())
+                    fields[field.name + kind] = hash(tuple(map(repr, attributes.values()))), attributes
+            # Keyed by name, so renaming a field changes the digest, and unordered, so reordering them does not
+            digest = hash(frozenset((name, digest) for name, (digest, _) in fields.items()))
+            self.endpoints[endpoint.method, endpoint.collection] = digest, fields
+        self.value = hash((tuple(map(repr, self.attributes.values())),
+                           tuple((key, digest) for key, (digest, _) in self.endpoints.items())))
+
+
+def diff(old, new, old_naming=None, new_naming=None) -> list:
+    """
+    Returns the :class:`Change` between two apps, as the apps of two snapshots, sorted by resource.
+    Resources with the same fingerprint of their settings and schema are skipped.
+    """
+    old_domain, new_domain = old.config['DOMAIN'], new.config['DOMAIN']
+    keys = [key for key in sorted(old_domain.keys() | new_domain.keys())
+            if key not in old_domain or key not in new_domain
+            or _fingerprint(old_domain[key]) != _fingerprint(new_domain[key])]
+    return diff_resources(keys, old_domain, new_domain, ModelBuilder(old_naming), ModelBuilder(new_naming))
+
+
+def diff_snapshots(old_path: str, new_path: str) -> list:
+    """
+    Returns the :class:`Change` between two snapshot files. Only the resources whose lines differ are parsed.
+    """
+    from devicehub_doc.snapshot import load_resource, read_resources
+    old_lines, old_naming = read_resources(old_path)
+    new_lines, new_naming = read_resources(new_path)
+    keys = [key for key in sorted(old_lines.keys() | new_lines.keys()) if old_lines.get(key) != new_lines.get(key)]
+    old_domain = {key: load_resource(old_lines[key]) for key in keys if key in old_lines}
+    new_domain = {key: load_resource(new_lines[key]) for key in keys if key in new_lines}
+    return diff_resources(keys, old_domain, new_domain, ModelBuilder(old_naming), ModelBuilder(new_naming))
+
+
+def diff_resources(keys: list, old_domain: dict, new_domain: dict, old_builder, new_builder) -> list:
+    changes = []
+    for key in keys:
+        if key not in new_domain:
+            changes.append(Change(key, None, None, None, 'removed', old_domain[key]['_schema'].type_name(), None))
+        elif key not in old_domain:
+            changes.append(Change(key, None, None, None, 'added', None, new_domain[key]['_schema'].type_name()))
+        else:
+            old_digest = Digest(old_builder.build_resource(key, old_domain[key]))
+            new_digest = Digest(new_builder.build_resource(key, new_domain[key]))
+            if old_digest.value != new_digest.value:
+                changes.extend(diff_digests(key, old_digest, new_digest))
+    return changes
+
+
+def diff_digests(key: str, old: Digest, new: Digest):
+    """
+    Yields the changes between the digests of a resource, going only into the endpoints and fields
+    whose digests differ.
+    """
+    for attribute, value in old.attributes.items():
+        if new.attributes[attribute] != value:
+            yield Change(key, None, None, attribute, 'changed', value, new.attributes[attribute])
+    for method, collection in _union(old.endpoints, new.endpoints):
+        endpoint = (method, collection)
+        url = (new if endpoint in new.endpoints else old).attributes['URL']
+        label = '{} {}{}'.format(method, url, '' if collection else '/(_id)')
+        if endpoint not in new.endpoints:
+            yield Change(key, label, None, None, 'removed', None, None)
+        elif endpoint not in old.endpoints:
+            yield Change(key, label, None, None, 'added', None, None)
+        elif old.endpoints[endpoint][0] != new.endpoints[endpoint][0]:
+            old_fields, new_fields = old.endpoints[endpoint][1], new.endpoints[endpoint][1]
+            for name in _union(old_fields, new_fields):
+                if name not in new_fields:
+                    yield Change(key, label, name, None, 'removed', old_fields[name][1]['Type'], None)
+                elif name not in old_fields:
+                    yield Change(key, label, name, None, 'added', None, new_fields[name][1]['Type'])
+                elif old_fields[name][0] != new_fields[name][0]:
+                    old_attributes, new_attributes = old_fields[name][1], new_fields[name][1]
+                    for attribute, value in old_attributes.items():
+                        if repr(value) != repr(new_attributes[attribute]):
+                            yield Change(key, label, name, attribute, 'changed', value, new_attributes[attribute])
+
+
+def format_changes(changes: list) -> str:
+    """
+    Returns the changes as a Markdown changelog: the added and removed resources, and then a section for
+    every changed resource.
+    """
+    lines, resource = [], None
+    for change in changes:
+        if change.endpoint is None and change.attribute is None:
+            if not lines:
+                lines.append('## Resources\n')
+            lines.append('- `{}` ({}) {}.'.format(change.resource, change.old or change.new, change.action))
+    for change in changes:
+        if change.endpoint is None and change.attribute is None:
+            continue
+        if change.resource != resource:
+            resource = change.resource
+            lines.append('\n## {}\n'.format(resource))
+        where = '`{}`'.format(change.endpoint) if change.endpoint is not None else 'Resource'
+        if change.field is None and change.attribute is None:
+            lines.append('- {} {}.'.format(where, change.action))
+        elif change.field is None:
+            lines.append('- {}: {} changed from `{}` to `{}`.'.format(where, change.attribute, change.old, change.new))
+        elif change.attribute is None:
+            lines.append('- {}: field `{}` ({}) {}.'.format(where, change.field, change.old or change.new,
+                                                         change.action))
+        else:
+            lines.append('- {}: field `{}`: {} changed from `{}` to `{}`.'.format(where, change.field,
+                                                                                 change.attribute, change.old,
+                                                                                 change.new))
+    return '\n'.join(lines).strip() + '\n' if lines else 'No changes.\n'
+
+
+def _fingerprint(settings: dict) -> str:
+    return fingerprint(settings, settings['_schema'](False))
+
+
+def _union(old: dict, new: dict) -> list:
+    """The keys of both dictionaries, in the order of the old one and then the new ones."""
+    return list(old) + [key for key in new if key not in old]
@@ -1,76 +1,293 @@
-from ereuse_devicehub.resources.schema import UnitCodes
-from ereuse_devicehub.utils import Naming
-from ereuse_devicehub.validation import ALLOWED_WRITE_ROLES
+from collections import namedtuple
+from threading import Lock, local
+from types import MappingProxyType
+
+from devicehub_doc.profiling import NULL_PROFILER
+
+
+ATTRIBUTES = (
+    ('Unique', 'unique'),
+    ('Default', 'default'),
+    ('Allowed', 'allowed'),
+    ('Required', 'required'),
+    ('Description', 'description'),
+    ('Write only', 'writeonly'),
+    ('Read only', 'readonly'),
+    ('Modifiable', 'modifiable'),
+    ('Sink', 'sink'),
+    ('Unit Code', 'unitCode'),
+    ('Doc', 'doc'),
+    ('Roles with writing permission', None),  # The key is set by the naming of Doc
+    ('OR', 'or'),
+    ('Excludes', 'excludes'),
+)
+"""The attributes of a field, in order, as (label, key in the schema)."""
+
+
+class Field:
+    """
+    A field as returned by :func:`Doc.get_field`:
+    - name: the name of the field
+    - type: the type of the field
+    - reference: the typeName of a data_relation, or None
+    - schema: the schema of the field, which is not copied
+
+    Fields are immutable and compact. Their attributes are read from the schema when accessed through
+    the properties or :func:`attrs`, and :attr:`attr` only builds its dictionary when used.
+    """
+    __slots__ = 'name', 'type', 'reference', 'schema', 'unit_code', 'write_roles'
+
+    def __init__(self, name: str, type: str, reference: str, schema: dict, unit_code: str = None,
+                 write_roles: str = None):
+        """
+        :param unit_code: The humanized unit code, if the schema has one.
+        :param write_roles: The key of the schema with the roles with writing permission.
+        """
+        setattr = object.__setattr__
+        setattr(self, 'name', name)
+        setattr(self, 'type', type)
+        setattr(self, 'reference', reference)
+        setattr(self, 'schema', schema)
+        setattr(self, 'unit_code', unit_code)
+        setattr(self, 'write_roles', write_roles)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('Fields are immutable.')
+
+    def __reduce__(self):
+        return Field, (self.name, self.type, self.reference, self.schema, self.unit_code, self.write_roles)
+
+    def __repr__(self):
+        return 'Field({!r}, {!r}, {!r})'.format(self.name, self.type, self.reference)
+
+    def renamed(self, name: str) -> 'Field':
+        return Field(name, self.type, self.reference, self.schema, self.unit_code, self.write_roles)
+
+    @property
+    def unique(self):
+        return self.schema.get('unique')
+
+    @property
+    def allowed(self):
+        return self.schema.get('allowed')
+
+    @property
+    def required(self):
+        return self.schema.get('required')
+
+    @property
+    def write_only(self):
+        return self.schema.get('writeonly')
+
+    @property
+    def read_only(self):
+        return self.schema.get('readonly')
+
+    @property
+    def sink(self):
+        return self.schema.get('sink', 0)
+
+    def attrs(self):
+        """
+        Yields (label, value) of every attribute of :data:`ATTRIBUTES`, in order. Nonexisting values are None.
+        """
+        schema = self.schema
+        for label, key in ATTRIBUTES:
+            if label == 'Sink':
+                yield label, schema.get('sink', 0)
+            elif label == 'Unit Code':
+                yield label, self.unit_code
+            elif key is None:
+                yield label, schema.get(self.write_roles)
+            else:
+                yield label, schema.get(key)
+
+    @property
+    def attr(self) -> MappingProxyType:
+        """The attributes of :func:`attrs` as a read-only dictionary, built on every access."""
+        return MappingProxyType(dict(self.attrs()))
+
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses size')
+
+
+class FieldCache:
+    """
+    Memoizes the fields extracted by :func:`Doc.get_field`.
+
+    Entries are keyed by the identity of the schema of the field and the options that change the result,
+    and keep a reference to the schema so its id cannot be reused by another one while cached. Call
+    :func:`release` once the schemas are not used anymore, as after every resource, so the cache does not keep
+    them alive. Every thread has its own entries, so releasing them does not affect other threads.
+    """
+    def __init__(self):
+        self._local = local()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def _entries(self) -> dict:
+        try:
+            return self._local.entries
+        except AttributeError:
+            entries = self._local.entries = {}
+            return entries
+
+    def get(self, key: tuple, schema: dict, extract) -> tuple:
+        """
+        Returns the cached fields for `key`, calling `extract` and storing its result if there are none.
+        """
+        entries = self._entries
+        entry = entries.get(key)
+        if entry is not None and entry[0] is schema:
+            with self._lock:
+                self.hits += 1
+            return entry[1]
+        fields = tuple(extract())
+        entries[key] = schema, fields
+        with self._lock:
+            self.misses += 1
+        return fields
+
+    def info(self) -> CacheInfo:
+        """The counters of all threads, with the size of the entries of the calling thread."""
+        return CacheInfo(self.hits, self.misses, len(self._entries))
+
+    def release(self):
+        """Drops the entries of the calling thread, keeping the counters."""
+        self._entries.clear()
+
+    def clear(self):
+        self.release()
+        self.hits = self.misses = 0
+
+
+class DeviceHubNaming:
+    """
+    The helpers of DeviceHub that :class:`Doc` uses to describe fields. They are imported when
+    instantiating this class, so importing this module does not import DeviceHub.
+
+    Other implementations need the same interface: `type`, `humanize_unit` and `write_roles`.
+    """
+    def __init__(self):
+        from ereuse_devicehub.resources.schema import UnitCodes
+        from ereuse_devicehub.utils import Naming
+        from ereuse_devicehub.validation import ALLOWED_WRITE_ROLES
+        self.type = Naming.type
+        """Returns the type name of a resource name."""
+        self.humanize_unit = UnitCodes.humanize
+        """Returns the human name of an unit code."""
+        self.write_roles = ALLOWED_WRITE_ROLES
+        """The key of the schema setting the roles that can write a field."""
 
 
 class Doc:
     """
     Base class that transforms difficult python-eve like API and schema to something easier
     for documenting programs.
+
+    `naming` replaces the helpers of :class:`DeviceHubNaming`, used by default, and `profiler` is
+    a :class:`devicehub_doc.profiling.Profiler` that records the generation.
     """
-    def get_fields(self, schema, **options):
+    def __init__(self, naming=None, profiler=None):
+        self.field_cache = FieldCache()
+        self._naming = naming
+        self.profiler = profiler if profiler is not None else NULL_PROFILER
+
+    @property
+    def naming(self):
+        if self._naming is None:
+            self._naming = DeviceHubNaming()
+        return self._naming
+
+    def get_fields(self, schema, **options) -> list:
         """
-        Returns a list of dictionaries of the style of :func: `get_field`
+        Returns a list of the :class:`Field` of :func:`get_field` for every field of the schema.
         """
         fields = []
         for name, sub_settings in schema.items():
             fields.extend(self.get_field(name, sub_settings, **options))
         return fields
 
-    def get_field(self, field_name: str, schema: dict, **options) -> list:
-        """
-        Returns a list of a) the passed-in field, and b) inner fields represented by passed-in-fieldname.inner-feldname:
-        - reference: the typeName of a data_relation
-        - type: the type of the field
-        - attr: dictionary of attributes. Nonexisting values are set as None, all keys exist.
-        - name: the name of the field
-        """
-        result_field = {'type': schema['type'], 'name': field_name}
-        if self.special_cases(result_field, schema, **options):
-            return [result_field] + result_field.pop('_inner_fields', [])
-        if 'data_relation' in schema:
-            result_field['reference'] = Naming.type(schema['data_relation']['resource'])
-        elif schema['type'] == 'list' and 'schema' in schema:
-            subschema = schema['schema']
-            if 'data_relation' in subschema:
-                result_field['reference'] = Naming.type(subschema['data_relation']['resource'])
-            elif subschema['type'] == 'dict':
-                self.get_dict(result_field, subschema['schema'], **options)
-        elif schema['type'] == 'dict' and 'schema' in schema:
-            self.get_dict(result_field, schema['schema'], **options)
-        result_field['attr'] = {
-            'Unique': schema.get('unique'),
-            'Default': schema.get('default'),
-            'Allowed': schema.get('allowed'),
-            'Required': schema.get('required'),
-            'Description': schema.get('description'),
-            'Write only': schema.get('writeonly'),
-            'Read only': schema.get('readonly'),
-            'Modifiable': schema.get('modifiable'),
-            'Sink': schema.get('sink', 0),
-            'Unit Code': schema.get('unitCode'),
-            'Doc': schema.get('doc'),
-            'Roles with writing permission': schema.get(ALLOWED_WRITE_ROLES),
-            'OR': schema.get('or'),
-            'Excludes': schema.get('excludes')
-        }
-        if 'unitCode' in schema:
-            result_field['attr']['Unit Code'] = UnitCodes.humanize(schema['unitCode']) + ' ({})'.format(schema['unitCode'])
-        return [result_field] + result_field.pop('_inner_fields', [])
+    def get_field(self, field_name: str, schema: dict, **options) -> tuple:
+        """
+        Returns a tuple of a) the passed-in field, and b) inner fields represented by passed-in-fieldname.inner-feldname,
+        as :class:`Field`.
+
+        The fields are extracted once per schema, method and schema_name and then served from :attr:`field_cache`,
+        so they must not be modified.
+        """
+        self.filter_field(field_name, schema, **options)
+        key = (id(schema), field_name, options.get('method'), options.get('schema_name'))
+        return self.field_cache.get(key, schema, lambda: self.extract_field(field_name, schema, **options))
+
+    def filter_field(self, field_name: str, schema: dict, **options):
+        """
+        Hook to leave out fields, and inner fields, by raising an exception. An inner field left out
+        leaves out the field containing it too. Doc keeps all fields.
+        """
+        pass
+
+    def extract_field(self, field_name: str, schema: dict, **options):
+        """
+        Yields the fields of :func:`get_field` without using the cache.
+
+        The inner fields of dicts are traversed depth first with an explicit stack, which carries the dotted
+        name of the parent down, so deep schemas are flattened without recursion and in the order of the schemas.
+        """
+        naming = self.naming
+        stack = [iter(((field_name, schema),))]
+        prefixes = ['']
+        while stack:
+            try:
+                name, schema = next(stack[-1])
+            except StopIteration:
+                stack.pop()
+                prefixes.pop()
+                continue
+            if len(stack) > 1:
+                self.filter_field(name, schema, **options)
+            result_field = {'type': schema['type'], 'name': name}
+            inner_schema = None
+            if self.special_cases(result_field, schema, **options):
+                yield self.freeze(result_field, prefixes[-1], schema)
+                continue
+            if 'data_relation' in schema:
+                result_field['reference'] = naming.type(schema['data_relation']['resource'])
+            elif schema['type'] == 'list' and 'schema' in schema:
+                subschema = schema['schema']
+                if 'data_relation' in subschema:
+                    result_field['reference'] = naming.type(subschema['data_relation']['resource'])
+                elif subschema['type'] == 'dict':
+                    inner_schema = self.get_dict(result_field, subschema['schema'], **options)
+            elif schema['type'] == 'dict' and 'schema' in schema:
+                inner_schema = self.get_dict(result_field, schema['schema'], **options)
+            unit_code = None
+            if 'unitCode' in schema:
+                unit_code = naming.humanize_unit(schema['unitCode']) + ' ({})'.format(schema['unitCode'])
+            field = self.freeze(result_field, prefixes[-1], schema, unit_code)
+            yield field
+            if inner_schema is not None:
+                stack.append(iter(inner_schema.items()))
+                prefixes.append(field.name + '.')
+
+    def freeze(self, result_field: dict, prefix: str, schema: dict, unit_code: str = None) -> Field:
+        return Field(prefix + result_field['name'], result_field['type'], result_field.get('reference'), schema,
+                     unit_code, self.naming.write_roles)
 
     def get_dict(self, result_parent_field: dict, schema: dict, **options):
         """
         Updates the field by adding information from the 'schema' field in dict
-        :param result_parent_field: Dictionary from :func: `get_field` to update
+        :param result_parent_field: Dictionary from :func: `extract_field` to update
         :param schema: Schema representing the dictionary
+        :return: The schema of the inner fields, or None if the dict is a typed schema and has no inner fields.
         """
         try:
             result_parent_field['type'] += '_of_{}'.format(schema.type_name())
-        except:
-            fields = self.get_fields(schema, **options)
-            for field in fields:
-                field['name'] = result_parent_field['name'] + '.' + field['name']
-            result_parent_field['_inner_fields'] = fields
+        except Exception:
+            return schema
+        return None
 
     @staticmethod
     def special_cases(result_field, schema, **options):
@@ -0,0 +1,166 @@
+from collections import namedtuple
+from itertools import chain
+
+Partition = namedtuple('Partition', 'name roots members engine base_classes')
+"""
+A group of classes drawn in their own diagram:
+- roots: type names of the classes that belong to the group together with all their subclasses.
+- members: type names of other classes that belong to the group, without their subclasses.
+- engine: the Graphviz layout engine of the diagram.
+- base_classes: whether the diagram includes the classes that are not in any group (as RDFS or Thing).
+"""
+
+
+class ClassIndex:
+    """
+    Indexes a class hierarchy in one pass, by type name: the order of the classes, their parents and
+    their fields. :func:`partition` then tells the partition each class belongs to.
+    """
+    def __init__(self, root: str, names: list, parents: dict, ancestors: dict, fields: dict):
+        """
+        :param root: The type name of the root of the hierarchy.
+        :param names: The type names of all the classes, starting by the root.
+        :param parents: The type name of the parent of every class, None for the root.
+        :param ancestors: The type names of every class and its ancestors, from the closest one.
+        :param fields: The fields of every class, as in `actual_fields()`.
+        """
+        self.root = root
+        self.names = names
+        self.parents = parents
+        self.ancestors = ancestors
+        self.fields = fields
+
+    @classmethod
+    def from_rdfs(cls, rdfs) -> 'ClassIndex':
+        """
+        Indexes `rdfs` and its subclasses, walking the hierarchy and getting their fields only once.
+        """
+        rdfs._import_schemas = False
+        classes = [rdfs] + [subclass for subclass in rdfs.subclasses() if subclass is not rdfs]
+        names, parents, ancestors, fields = [], {}, {}, {}
+        for subclass in classes:
+            name = subclass.type_name()
+            names.append(name)
+            try:
+                parents[name] = subclass.superclasses(1)[1].type_name()
+            except AttributeError:
+                parents[name] = None
+            ancestors[name] = [ancestor.type_name() for ancestor in subclass.__mro__
+                               if isinstance(ancestor, type) and issubclass(ancestor, rdfs)]
+            fields[name] = subclass.actual_fields()
+        return cls(rdfs.type_name(), names, parents, ancestors, fields)
+
+    def partition(self, partitions) -> dict:
+        """
+        Returns the name of the group of every class, in time linear to the size of the hierarchy.
+
+        A class belongs to the first partition listing it as a member or, otherwise, to the partition of its
+        closest ancestor (or itself) that is a root. Classes of no partition have None as group.
+        """
+        groups_of_roots, groups_of_members = {}, {}
+        for partition in partitions:
+            for root in partition.roots:
+                groups_of_roots.setdefault(root, partition.name)
+            for member in partition.members:
+                groups_of_members.setdefault(member, partition.name)
+        groups = {}
+        for name in self.names:
+            group = groups_of_members.get(name)
+            if group is None:
+                group = next((groups_of_roots[ancestor] for ancestor in self.ancestors[name]
+                              if ancestor in groups_of_roots), None)
+            groups[name] = group
+        return groups
+
+    def split(self, references: dict, max_size: int, sizes: dict = None) -> list:
+        """
+        Splits the classes in partitions whose sizes add up to `max_size` at most, so every diagram is laid
+        out quickly. A class alone bigger than `max_size` gets its own partition.
+
+        Classes connected by inheritance or `references` are kept together when their connected component
+        fits. Bigger components are split along the hierarchy: subclasses of a class that do not fit with it
+        form their own parts. The parts are then packed, in the order of the hierarchy, into the first
+        partition with room for them.
+
+        :param references: The type names every class references.
+        :param sizes: The size of every class, as the nodes and edges it adds to a diagram. 1 by default.
+        :return: The partitions, as :class:`Partition` with the classes as members, laid out with dot.
+        """
+        sizes = sizes or dict.fromkeys(self.names, 1)
+        position = {name: i for i, name in enumerate(self.names)}
+        # Connected components, with union-find
+        component_of = {name: name for name in self.names}
+
+        def find(name):
+            while component_of[name] != name:
+                component_of[name] = component_of[component_of[name]]
+                name = component_of[name]
+            return name
+
+        for name in self.names:
+            for other in chain((self.parents[name],), references.get(name, ())):
+                if other in component_of:
+                    component_of[find(other)] = find(name)
+        components = {}
+        for name in self.names:
+            components.setdefault(find(name), []).append(name)
+        # Parts: the components that fit and, for the others, subtrees of their hierarchy
+        parts = []
+        for component in components.values():
+            if sum(sizes[name] for name in component) <= max_size:
+                parts.append(component)
+            else:
+                parts.extend(self._split_hierarchy(component, max_size, sizes))
+        parts.sort(key=lambda part: position[part[0]])
+        # Packing, first fit
+        packed, room = [], []
+        for part in parts:
+            size = sum(sizes[name] for name in part)
+            i = next((i for i, free in enumerate(room) if size <= free), None)
+            if i is None:
+                packed.append(list(part))
+                room.append(max_size - size)
+            else:
+                packed[i].extend(part)
+                room[i] -= size
+        partitions = []
+        for members in packed:
+            members.sort(key=position.__getitem__)
+            name = members[0] if len(members) == 1 else '{} and {} more'.format(members[0], len(members) - 1)
+            partitions.append(Partition(name, (), tuple(members), 'dot', False))
+        return partitions
+
+    def _split_hierarchy(self, component: list, max_size: int, sizes: dict) -> list:
+        """
+        Returns the subtrees of the component that fit in `max_size`, taking them from the top, and the classes
+        with a subtree too big, alone.
+        """
+        members = set(component)
+        children = {name: [] for name in component}
+        for name in component:
+            if self.parents[name] in members:
+                children[self.parents[name]].append(name)
+        tops = [name for name in component if self.parents[name] not in members]
+        preorder, pending = [], list(reversed(tops))
+        while pending:
+            name = pending.pop()
+            preorder.append(name)
+            pending.extend(reversed(children[name]))
+        subtree_sizes = {}
+        for name in reversed(preorder):
+            subtree_sizes[name] = sizes[name] + sum(subtree_sizes[child] for child in children[name])
+        parts = []
+        stack = list(reversed(tops))
+        while stack:
+            name = stack.pop()
+            if subtree_sizes[name] <= max_size:
+                part, pending = [], [name]
+                while pending:
+                    subclass = pending.pop()
+                    part.append(subclass)
+                    pending.extend(reversed(children[subclass]))
+                parts.append(part)
+            else:
+                parts.append([name])
+                stack.extend(reversed(children[name]))
+        return parts
@@ -0,0 +1,60 @@
+"""
+    Emits the API of a :class:`devicehub_doc.model.Model` as Markdown, with a table of fields per endpoint.
+"""
+from os.path import expanduser, join
+
+from devicehub_doc.writer import write_atomic
+
+
+class ApiToMarkdown:
+    """
+    Writes the resources of the `model` as Markdown in `output`: a path (by default `~/api.md`) that is
+    replaced atomically, or a file object. Fields are sorted by sink as in the RST, and the fields python-eve
+    adds to every resource are not listed.
+    """
+    def __init__(self, model, output=None):
+        self.model = model
+        self.output = output if output is not None else join(expanduser('~'), 'api.md')
+        self.write()
+
+    def write(self):
+        write_atomic(self.iter_doc(), self.output)
+        print('Markdown doc written.')
+
+    def iter_doc(self):
+        yield '# API\n'
+        for resource in self.model.resources.values():
+            if resource.endpoints:
+                yield '\n## {}\n'.format(resource.type_name)
+                for endpoint in resource.endpoints:
+                    yield self.document_endpoint(resource, endpoint)
+
+    def document_endpoint(self, resource, endpoint) -> str:
+        url = '/(database)/' + resource.url
+        if not endpoint.collection:
+            url += '/(_id)'
+        doc = ['\n### `{} {}`\n'.format(endpoint.method, url)]
+        if not endpoint.collection and resource.additional_lookup is not None:
+            doc.append('\nAdditional lookup: `/(database)/{}/({})`, as {}.\n'.format(
+                resource.url, resource.additional_lookup['field'], resource.additional_lookup['url']))
+        if endpoint.fields:
+            direction = 'Request' if endpoint.method == 'POST' else 'Response'
+            doc.append(self.get_table('{} fields'.format(direction), endpoint.fields))
+        if endpoint.extra_fields:
+            doc.append(self.get_table('Extra response fields', endpoint.extra_fields))
+        return ''.join(doc)
+
+    def get_table(self, title: str, fields) -> str:
+        rows = ['\n{}:\n\n'.format(title), '| Field | Type | Required | Attributes |\n', '|---|---|---|---|\n']
+        for field in sorted(fields, key=lambda field: field.sink if field.sink is not None else 0,
+                            reverse=True):
+            field_type = field.type if field.reference is None else '{} → {}'.format(field.type, field.reference)
+            attrs = ', '.join('{}: {}'.format(name, value) for name, value in field.attrs()
+                              if value is not None and name != 'Required' and name != 'Sink')
+            rows.append('| `{}` | {} | {} | {} |\n'.format(field.name, _cell(field_type),
+                                                           'yes' if field.required else '', _cell(attrs)))
+        return ''.join(rows)
+
+
+def _cell(text: str) -> str:
+    return text.replace('|', '\\|').replace('\n', ' ')
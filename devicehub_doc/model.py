@@ -0,0 +1,199 @@
+"""
+    The intermediate model of the documentation: the resources of the API with their endpoints and fields,
+    and the classes of the hierarchy with their fields. References to other resources are the `reference`
+    of the fields, so they are the relations of the model.
+
+    The schemas are traversed once to build the model, and the emitters format it:
+    :class:`devicehub_doc.api_rst.ApiToRST`, :class:`devicehub_doc.openapi.ApiToOpenAPI`,
+    :class:`devicehub_doc.markdown.ApiToMarkdown` and :class:`devicehub_doc.class_diagram.ClassDiagram`:
+
+        model = Model.from_app(app, index)
+        ApiToRST(app, model=model)
+        ApiToOpenAPI(model)
+        ApiToMarkdown(model)
+        ClassDiagram(model=model)
+"""
+from itertools import chain
+
+from devicehub_doc.doc import Doc
+
+CONFIG_KEYS = 'ID_FIELD', 'LAST_UPDATED', 'DATE_CREATED', 'META', 'ITEM_CACHE'
+"""The keys of the app config that the emitters use."""
+
+
+class Resource:
+    """
+    A resource of the DOMAIN:
+    - key: the key of the resource in the DOMAIN
+    - type_name: the type name of its schema
+    - url, item_url and additional_lookup: as in its settings
+    - declares_id: whether its schema has an `_id` field
+    - endpoints: the :class:`Endpoint` that have fields, first the ones of the resource and then
+      the ones of the items
+    """
+    __slots__ = 'key', 'type_name', 'url', 'item_url', 'additional_lookup', 'declares_id', 'endpoints'
+
+    def __init__(self, key: str, type_name: str, url: str, item_url: str, additional_lookup: dict,
+                 declares_id: bool, endpoints: tuple):
+        self.key = key
+        self.type_name = type_name
+        self.url = url
+        self.item_url = item_url
+        self.additional_lookup = additional_lookup
+        self.declares_id = declares_id
+        self.endpoints = endpoints
+
+    def __repr__(self):
+        return 'Resource({!r})'.format(self.key)
+
+
+class Endpoint:
+    """
+    A method of a resource:
+    - method: the HTTP method
+    - collection: True for the endpoint of the resource, False for the one of its items
+    - fields: the :class:`devicehub_doc.doc.Field` of the body, the request for POST and the response for GET,
+      empty for PATCH and DELETE
+    - extra_fields: the fields added to the response of POST and PATCH
+    """
+    __slots__ = 'method', 'collection', 'fields', 'extra_fields'
+
+    def __init__(self, method: str, collection: bool, fields: tuple, extra_fields: tuple = ()):
+        self.method = method
+        self.collection = collection
+        self.fields = fields
+        self.extra_fields = extra_fields
+
+    def __repr__(self):
+        return 'Endpoint({!r}, {!r})'.format(self.method, self.collection)
+
+
+class ClassNode:
+    """
+    A class of the hierarchy with the type name of its parent, None for the root, and its fields.
+    """
+    __slots__ = 'name', 'parent', 'fields'
+
+    def __init__(self, name: str, parent: str, fields: tuple):
+        self.name = name
+        self.parent = parent
+        self.fields = fields
+
+    def __repr__(self):
+        return 'ClassNode({!r})'.format(self.name)
+
+
+class Model:
+    """
+    The resources, by key and sorted, and the classes, by type name and in the order of the `index`
+    (a :class:`devicehub_doc.hierarchy.ClassIndex`), of an app. Classes are only built if there is an index.
+    """
+    def __init__(self, config: dict, resources: dict, index=None, classes: dict = None):
+        self.config = config
+        self.resources = resources
+        self.index = index
+        self.classes = classes
+
+    @classmethod
+    def from_app(cls, app, index=None, naming=None, profiler=None) -> 'Model':
+        """
+        Builds the model of `app`, that can be a :class:`devicehub_doc.snapshot.Snapshot`, traversing every
+        schema once.
+        """
+        builder = ModelBuilder(naming, profiler)
+        config = {key: app.config.get(key) for key in CONFIG_KEYS}
+        domain = app.config['DOMAIN']
+        resources = {key: builder.build_resource(key, domain[key]) for key in sorted(domain)}
+        classes = None
+        if index is not None:
+            classes = {name: builder.build_class(index, name) for name in index.names}
+        return cls(config, resources, index, classes)
+
+
+class ModelBuilder(Doc):
+    """
+    Builds the parts of a :class:`Model`, extracting the fields of every method as the API represents them.
+    """
+    def build_resource(self, key: str, settings: dict, schema: dict = None) -> Resource:
+        type_name = settings['_schema'].type_name()
+        if schema is None:
+            schema = settings['_schema'](False)  # Shared by all methods so their fields are extracted only once
+        endpoints = []
+        for method, collection in chain(((method, True) for method in settings['resource_methods']),
+                                        ((method, False) for method in settings['item_methods'])):
+            with self.profiler.time('endpoint', type_name, method):
+                endpoint = self.build_endpoint(settings, schema, type_name, method, collection)
+            if endpoint is None:
+                self.profiler.count('empty endpoints', 1, type_name, method)
+            else:
+                endpoints.append(endpoint)
+        self.field_cache.release()  # The schema is only shared by the methods of this resource
+        return Resource(key, type_name, settings['url'], settings.get('item_url', 'string'),
+                        settings.get('additional_lookup'), '_id' in schema, tuple(endpoints))
+
+    def build_endpoint(self, settings: dict, schema: dict, type_name: str, method: str, collection: bool):
+        """
+        :return: The :class:`Endpoint`, or None if it is a POST or GET without fields.
+        """
+        options = {'method': method, 'schema_name': type_name, 'settings': settings}
+        fields = ()
+        if method != 'DELETE' and method != 'PATCH':
+            fields = tuple(chain.from_iterable(self.extract(field_name, inner_schema, **options)
+                                               for field_name, inner_schema in schema.items()))
+            if not fields:
+                return None
+        extra_fields = ()
+        if (method == 'POST' or method == 'PATCH') and 'extra_response_fields' in settings:
+            extra_fields = tuple(chain.from_iterable(self.extract(field_name, schema[field_name], **options)
+                                                     for field_name in settings['extra_response_fields']))
+        return Endpoint(method, collection, fields, extra_fields)
+
+    def extract(self, field_name: str, schema: dict, **options) -> tuple:
+        """
+        Returns the fields of :func:`get_field`, or none if the field is left out.
+        """
+        scope, method = options['schema_name'], options['method']
+        try:
+            with self.profiler.time('extraction', scope, method):
+                fields = self.get_field(field_name, schema, **options)
+        except EmptyError:
+            self.profiler.count('fields left out', 1, scope, method)
+            return ()
+        self.profiler.count('fields', len(fields), scope, method)
+        return fields
+
+    def build_class(self, index, name: str, scope: str = None) -> ClassNode:
+        """
+        Builds the class `name` of the `index`. Only the root shows the `@type` field.
+        :param scope: The scope of the profiler, the type name by default.
+        """
+        schema = index.fields[name]
+        if name != index.root:
+            schema = {field_name: value for field_name, value in schema.items() if field_name != '@type'}
+        scope = scope or name
+        with self.profiler.time('extraction', scope):
+            fields = self.get_fields(schema, schema_name=name)
+        self.profiler.count('fields', len(fields), scope)
+        return ClassNode(name, index.parents[name], tuple(fields))
+
+    def filter_field(self, field_name, schema, **options):
+        """
+        :raises EmptyError: If the field is not part of the representation of the method.
+        """
+        method = options.get('method')
+        if not (schema.get('readonly', False) and (method == 'POST' or method == 'PATCH' or method == 'PUT')) \
+                and not (schema.get('writeonly', False) and method == 'GET') \
+                and not (not schema.get('modifiable', True) and (method == 'PATCH' or method == 'PUT')):
+            # Removing fields that are not projected
+            if method == 'GET':
+                try:
+                    if not options['settings']['datasource']['projection'][field_name]:
+                        raise EmptyError()
+                except KeyError:
+                    pass
+        else:
+            raise EmptyError()
+
+
+class EmptyError(Exception):
+    pass
@@ -0,0 +1,197 @@
+"""
+    Emits the API of a :class:`devicehub_doc.model.Model` as an OpenAPI 3 JSON document.
+"""
+import json
+from os.path import expanduser, join
+
+from devicehub_doc.writer import write_atomic
+
+TYPES = {
+    'string': {'type': 'string'},
+    'objectid': {'type': 'string'},
+    'hid': {'type': 'string'},
+    'url': {'type': 'string', 'format': 'uri'},
+    'email': {'type': 'string', 'format': 'email'},
+    'datetime': {'type': 'string', 'format': 'date-time'},
+    'integer': {'type': 'integer'},
+    'natural': {'type': 'integer', 'minimum': 0},
+    'float': {'type': 'number'},
+    'number': {'type': 'number'},
+    'boolean': {'type': 'boolean'},
+    'dict': {'type': 'object'},
+    'list': {'type': 'array', 'items': {}},
+}
+"""The JSON Schema of the python-eve types. Other types are strings with their type in `x-eve-type`."""
+
+STATUS = {'POST': '201', 'DELETE': '204'}
+"""The status code of the methods that do not answer with 200."""
+
+
+class ApiToOpenAPI:
+    """
+    Writes the resources of the `model` as an OpenAPI document, with a path for the resources and other for
+    their items, in `output`: a path (by default `~/api.json`) that is replaced atomically, or a file object.
+
+    The schemas of the operations are built from the fields of the endpoints, with the fields python-eve adds.
+    Nested fields are properties of their dicts, and references are strings with the type of the referenced
+    resource in `x-reference`.
+    """
+    def __init__(self, model, output=None, title='DeviceHub', version='1'):
+        self.model = model
+        self.config = model.config
+        self.output = output if output is not None else join(expanduser('~'), 'api.json')
+        self.title = title
+        self.version = version
+        self.write()
+
+    def write(self):
+        write_atomic((json.dumps(self.get_document(), indent=2),), self.output)
+        print('OpenAPI doc written.')
+
+    def get_document(self) -> dict:
+        paths = {}
+        for resource in self.model.resources.values():
+            for endpoint in resource.endpoints:
+                path = '/{database}/' + resource.url + ('' if endpoint.collection else '/{_id}')
+                paths.setdefault(path, {})[endpoint.method.lower()] = self.get_operation(resource, endpoint)
+            if resource.type_name == 'Account' and resource.endpoints:
+                paths['/{database}/login'] = {'post': self.get_login()}
+        return {
+            'openapi': '3.0.3',
+            'info': {'title': self.title, 'version': self.version},
+            'paths': paths,
+            'components': {'securitySchemes': {'token': {'type': 'http', 'scheme': 'basic'}}},
+            'security': [{'token': []}],
+        }
+
+    def get_operation(self, resource, endpoint) -> dict:
+        method = endpoint.method
+        parameters = [{'name': 'database', 'in': 'path', 'required': True, 'schema': {'type': 'string'}}]
+        if not endpoint.collection:
+            description = 'As {}.'.format(resource.item_url)
+            if resource.additional_lookup is not None:
+                description += ' Or the {field} of the resource, as {url}.'.format(**resource.additional_lookup)
+            parameters.append({'name': '_id', 'in': 'path', 'required': True, 'schema': {'type': 'string'},
+                               'description': description})
+        operation = {
+            'operationId': '{}_{}{}'.format(method.lower(), resource.key, '' if endpoint.collection else '_item'),
+            'tags': [resource.type_name],
+            'parameters': parameters,
+        }
+        status = STATUS.get(method, '200')
+        if method == 'DELETE':
+            operation['responses'] = {status: {'description': 'Deleted.'}}
+            return operation
+        response = self.get_object(endpoint.extra_fields)
+        properties = response['properties']
+        if method == 'POST' or method == 'PUT':
+            operation['requestBody'] = {'required': True, 'content': {'application/json': {
+                'schema': self.get_object(endpoint.fields)}}}
+        if method != 'PATCH':
+            properties.update(self.get_eve_fields(resource))
+        if method == 'GET':
+            item = self.get_object(endpoint.fields)
+            item['properties'].update(properties)
+            if endpoint.collection:
+                response = {'type': 'object', 'properties': {
+                    '_items': {'type': 'array', 'items': item},
+                    '_meta': {'type': 'object', 'description': 'Provides pagination data.', 'properties': {
+                        'max_results': {'type': 'integer', 'minimum': 0},
+                        'total': {'type': 'integer', 'minimum': 0},
+                        'page': {'type': 'integer', 'minimum': 0},
+                    }},
+                }}
+            else:
+                response = item
+        response['properties']['_links'] = {'type': 'object', 'description': 'Provides HATEOAS directives.'}
+        operation['responses'] = {status: {'description': '', 'content': {'application/json': {'schema': response}}}}
+        return operation
+
+    def get_eve_fields(self, resource) -> dict:
+        fields = {
+            self.config['LAST_UPDATED']: {'type': 'string', 'format': 'date-time', 'readOnly': True},
+            self.config['DATE_CREATED']: {'type': 'string', 'format': 'date-time', 'readOnly': True},
+        }
+        if not resource.declares_id:
+            fields[self.config['ID_FIELD']] = {'type': 'string', 'readOnly': True}
+        return fields
+
+    @staticmethod
+    def get_login() -> dict:
+        string = {'type': 'string'}
+        return {
+            'operationId': 'login',
+            'tags': ['Account'],
+            'security': [],
+            'parameters': [{'name': 'database', 'in': 'path', 'required': True, 'schema': string}],
+            'requestBody': {'required': True, 'content': {'application/json': {'schema': {
+                'type': 'object', 'required': ['email', 'password'],
+                'properties': {'email': string, 'password': string}}}}},
+            'responses': {'200': {'description': '', 'content': {'application/json': {'schema': {
+                'type': 'object', 'properties': {
+                    'token': dict(string, description='The token of the user to use in `Authorization` header.'),
+                    'password': string, 'role': string, 'email': string, '_id': string,
+                    'databases': {'type': 'array', 'items': string}, 'defaultDatabase': string,
+                }}}}}},
+        }
+
+    def get_object(self, fields) -> dict:
+        """
+        Returns the schema of an object with the fields, putting the inner fields in the schemas of their dicts.
+        """
+        root = {'type': 'object', 'properties': {}}
+        schemas = {}
+        for field in fields:
+            parent_name, _, name = field.name.rpartition('.')
+            parent = root
+            if parent_name:
+                parent = schemas[parent_name]
+                if parent['type'] == 'array':
+                    parent = parent['items']
+                    parent['type'] = 'object'
+                parent.setdefault('properties', {})
+            schema = schemas[field.name] = self.get_schema(field)
+            parent['properties'][name] = schema
+            if field.required:
+                parent.setdefault('required', []).append(name)
+        return root
+
+    @staticmethod
+    def get_schema(field) -> dict:
+        field_type, _, type_name = field.type.partition('_of_')
+        schema = dict(TYPES.get(field_type) or {'type': 'string', 'x-eve-type': field_type})
+        if field.reference is not None:
+            reference = {'type': 'string', 'x-reference': field.reference}
+            if schema['type'] == 'array':
+                schema['items'] = reference
+            else:
+                schema = reference
+        elif type_name:
+            if schema['type'] == 'array':
+                schema['items'] = {'type': 'object', 'title': type_name}
+            else:
+                schema['title'] = type_name
+        elif schema['type'] == 'array':
+            schema['items'] = {}
+        for name, value in field.attrs():
+            if value is None:
+                continue
+            if name == 'Description':
+                schema['description'] = str(value)
+            elif name == 'Allowed':
+                schema['enum'] = [item if _is_json(item) else str(item) for item in value]
+            elif name == 'Default':
+                schema['default'] = value if _is_json(value) else str(value)
+            elif name == 'Unique':
+                schema['x-unique'] = bool(value)
+            elif name == 'Unit Code':
+                schema['x-unit'] = value
+        if field.read_only:
+            schema['readOnly'] = True
+        if field.write_only:
+            schema['writeOnly'] = True
+        return schema
+
+
+def _is_json(value) -> bool:
+    return value is None or type(value) in (str, int, float, bool)
@@ -0,0 +1,92 @@
+"""
+    Opt-in instrumentation of the generators. Pass a :class:`Profiler` to :class:`devicehub_doc.api_rst.ApiToRST`
+    or :class:`devicehub_doc.class_diagram.ClassDiagram` to get a JSON report of where the time goes.
+"""
+import json
+import os
+from contextlib import contextmanager, nullcontext
+from threading import Lock
+from time import perf_counter
+
+
+class Profiler:
+    """
+    Records the time of the phases of the generation and counts what they produce, by scope
+    (a resource or a diagram group) and method (an HTTP method or an image format).
+
+    The phases are exclusive except 'endpoint', which includes the phases of rendering an API endpoint.
+    Profilers can be shared by threads, but what worker processes record is lost.
+    """
+    def __init__(self, path: str = None):
+        """
+        :param path: Where :func:`save` writes the report.
+        """
+        self.path = path
+        self._lock = Lock()
+        self.phases = {}
+        self.counters = {}
+
+    @contextmanager
+    def time(self, phase: str, scope: str = None, method: str = None):
+        start = perf_counter()
+        try:
+            yield
+        finally:
+            seconds = perf_counter() - start
+            with self._lock:
+                entry = self.phases.setdefault((scope, method, phase), [0.0, 0])
+                entry[0] += seconds
+                entry[1] += 1
+
+    def count(self, counter: str, amount=1, scope: str = None, method: str = None):
+        with self._lock:
+            key = scope, method, counter
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def report(self) -> dict:
+        """
+        Returns the report: totals of every phase and counter, and the same by scope and method.
+        Entries without scope or method are under '*'.
+        """
+        report = {'phases': {}, 'counters': {}, 'scopes': {}}
+        with self._lock:
+            for (scope, method, phase), (seconds, calls) in self.phases.items():
+                self._add(report, 'phases', scope, method, phase, {'seconds': seconds, 'calls': calls})
+            for (scope, method, counter), amount in self.counters.items():
+                self._add(report, 'counters', scope, method, counter, amount)
+        return report
+
+    @staticmethod
+    def _add(report: dict, kind: str, scope, method, name: str, value):
+        total = report[kind].get(name)
+        if total is None:
+            report[kind][name] = dict(value) if isinstance(value, dict) else value
+        elif isinstance(value, dict):
+            for key in value:
+                total[key] += value[key]
+        else:
+            report[kind][name] = total + value
+        methods = report['scopes'].setdefault(scope or '*', {})
+        methods.setdefault(method or '*', {'phases': {}, 'counters': {}})[kind][name] = value
+
+    def save(self):
+        with open(self.path, 'w') as file:
+            json.dump(self.report(), file, indent=2, sort_keys=True)
+        print('Profile report written in {}.'.format(os.path.abspath(self.path)))
+
+
+class NullProfiler:
+    """
+    A :class:`Profiler` that records nothing, used when profiling is not enabled.
+    """
+    path = None
+    _context = nullcontext()
+
+    def time(self, phase: str, scope: str = None, method: str = None):
+        return self._context
+
+    def count(self, counter: str, amount=1, scope: str = None, method: str = None):
+        pass
+
+
+NULL_PROFILER = NullProfiler()
@@ -0,0 +1,312 @@
+"""
+    Snapshots of what the generators need from DeviceHub, so the documentation can be generated
+    without importing the app:
+
+        Snapshot.from_app(app).save('devicehub.jsonl.gz')  # Once, with DeviceHub
+        snapshot = Snapshot.load('devicehub.jsonl.gz')     # Then, without it
+        ApiToRST(snapshot, naming=snapshot.naming)
+        ClassDiagram(index=snapshot.index, naming=snapshot.naming)
+
+    A snapshot is a JSON Lines file, gzipped if its name ends in '.gz': a line with the config, one per
+    resource of the DOMAIN, one per class of the hierarchy and a last one with the naming. Files are written
+    and read line by line. Only the keys of the settings and schemas used by the generators are kept.
+"""
+import gzip
+import json
+
+from devicehub_doc.doc import ATTRIBUTES
+from devicehub_doc.hierarchy import ClassIndex
+from devicehub_doc.model import CONFIG_KEYS
+
+VERSION = 1
+
+SETTINGS_KEYS = 'url', 'resource_methods', 'item_methods', 'item_url', 'additional_lookup', 'extra_response_fields'
+"""The keys of the settings of a resource kept, besides `_schema` and the projection of the datasource."""
+
+RESOURCE_PREFIX = '{"resource":'
+"""How the lines of resources start, followed by their key."""
+
+
+class Literal(str):
+    """
+    A value that JSON cannot represent, kept as the text it is rendered with.
+    """
+    def __repr__(self):
+        return str(self)
+
+
+class LiteralList(list):
+    """
+    A collection that JSON cannot represent, kept as its items and the text it is rendered with.
+    """
+    def __init__(self, items: list, text: str):
+        super().__init__(items)
+        self.text = text
+
+    def __str__(self):
+        return self.text
+
+    __repr__ = __str__
+
+
+class TypedSchema(dict):
+    """
+    A loaded dict schema that has a type, of which the generators only use the name.
+    """
+    def __init__(self, type_name: str):
+        super().__init__()
+        self._type_name = type_name
+
+    def type_name(self) -> str:
+        return self._type_name
+
+
+class SchemaFactory:
+    """
+    Stands for the `_schema` class of the settings of a resource: it has its type name and returns its schema
+    when called. The schema is loaded once and shared.
+    """
+    def __init__(self, type_name: str, schema: dict):
+        self._type_name = type_name
+        self.schema = schema
+
+    def type_name(self) -> str:
+        return self._type_name
+
+    def __call__(self, *_) -> dict:
+        return self.schema
+
+    def __repr__(self):
+        return '<SchemaFactory {}>'.format(self._type_name)
+
+
+class SnapshotNaming:
+    """
+    The helpers of :class:`devicehub_doc.doc.DeviceHubNaming`, answered from the values recorded in the snapshot.
+    """
+    def __init__(self, write_roles: str, types: dict, units: dict):
+        self.write_roles = write_roles
+        self.types = types
+        self.units = units
+
+    def type(self, resource: str) -> str:
+        return self.types[resource]
+
+    def humanize_unit(self, code: str) -> str:
+        return self.units[code]
+
+
+class Snapshot:
+    """
+    The DOMAIN and config of an app, the index of its class hierarchy and its naming. As it has a `config`,
+    it can be passed to :class:`devicehub_doc.api_rst.ApiToRST` as the app.
+    """
+    def __init__(self, config: dict, index: ClassIndex, naming: SnapshotNaming):
+        self.config = config
+        self.index = index
+        self.naming = naming
+
+    @classmethod
+    def from_app(cls, app, rdfs=None, naming=None) -> 'Snapshot':
+        """
+        Exports the app, and the hierarchy of `rdfs`, by default the one of the class diagram.
+        """
+        from devicehub_doc.doc import DeviceHubNaming
+        if rdfs is None:
+            from devicehub_doc.class_diagram import devicehub_index
+            index = devicehub_index()
+        else:
+            index = ClassIndex.from_rdfs(rdfs)
+        exporter = Exporter(naming or DeviceHubNaming())
+        config = {key: exporter.value(app.config.get(key)) for key in CONFIG_KEYS}
+        config['DOMAIN'] = {key: exporter.settings(settings) for key, settings in app.config['DOMAIN'].items()}
+        index.fields = {name: exporter.schema(fields) for name, fields in index.fields.items()}
+        naming = SnapshotNaming(exporter.naming.write_roles, exporter.types, exporter.units)
+        return cls(load_config(config), load_index(index), naming)
+
+    def save(self, path: str):
+        with _open(path, 'wt') as file:
+            config = {key: encode(value) for key, value in self.config.items() if key != 'DOMAIN'}
+            _dump({'version': VERSION, 'config': config}, file)
+            for key, settings in self.config['DOMAIN'].items():
+                _dump({'resource': key, 'settings': encode(settings)}, file)
+            for name in self.index.names:
+                _dump({'class': name, 'parent': self.index.parents[name], 'ancestors': self.index.ancestors[name],
+                       'fields': encode(self.index.fields[name])}, file)
+            _dump({'naming': {'write_roles': self.naming.write_roles, 'types': self.naming.types,
+                              'units': self.naming.units}}, file)
+        print('Snapshot written in {}.'.format(path))
+
+    @classmethod
+    def load(cls, path: str) -> 'Snapshot':
+        config, names, parents, ancestors, fields, naming = {'DOMAIN': {}}, [], {}, {}, {}, None
+        with _open(path, 'rt') as file:
+            for line in file:
+                record = json.loads(line)
+                if 'resource' in record:
+                    config['DOMAIN'][record['resource']] = record['settings']
+                elif 'class' in record:
+                    name = record['class']
+                    names.append(name)
+                    parents[name] = record['parent']
+                    ancestors[name] = record['ancestors']
+                    fields[name] = record['fields']
+                elif 'config' in record:
+                    if record['version'] != VERSION:
+                        raise ValueError('Snapshot {} has version {}, not {}.'.format(path, record['version'],
+                                                                                    VERSION))
+                    config.update(record['config'])
+                else:
+                    naming = SnapshotNaming(**record['naming'])
+        index = ClassIndex(names[0] if names else None, names, parents, ancestors, fields)
+        return cls(load_config(config), load_index(index), naming)
+
+
+def read_resources(path: str) -> tuple:
+    """
+    Reads the resources of a snapshot without parsing their settings, so they can be compared as text.
+    :return: The lines of the resources by key, and the naming of the snapshot.
+    """
+    decoder = json.JSONDecoder()
+    lines, naming = {}, None
+    with _open(path, 'rt') as file:
+        for line in file:
+            if line.startswith(RESOURCE_PREFIX):
+                lines[decoder.raw_decode(line, len(RESOURCE_PREFIX))[0]] = line
+            elif line.startswith('{"naming":'):
+                naming = SnapshotNaming(**json.loads(line)['naming'])
+    return lines, naming
+
+
+def load_resource(line: str) -> dict:
+    """Returns the settings of a line of :func:`read_resources`."""
+    return load_config({'DOMAIN': {None: json.loads(line)['settings']}})['DOMAIN'][None]
+
+
+class Exporter:
+    """
+    Turns settings and schemas into JSON, recording the type names and units of the references and unit codes
+    it finds.
+    """
+    def __init__(self, naming):
+        self.naming = naming
+        self.types = {}
+        self.units = {}
+        self.field_keys = [key for _, key in ATTRIBUTES if key is not None] + [naming.write_roles]
+
+    def settings(self, settings: dict) -> dict:
+        result = {key: self.value(settings[key]) for key in SETTINGS_KEYS if key in settings}
+        if 'projection' in settings.get('datasource', {}):
+            result['datasource'] = {'projection': self.value(settings['datasource']['projection'])}
+        schema = settings['_schema']
+        result['_schema'] = {'type_name': schema.type_name(), 'fields': self.schema(schema(False))}
+        return result
+
+    def schema(self, schema) -> dict:
+        return {name: self.field(field) for name, field in schema.items()}
+
+    def field(self, field: dict) -> dict:
+        result = {'type': field['type']}
+        for key in self.field_keys:
+            if key in field:
+                result[key] = self.value(field[key])
+        if 'unitCode' in field:
+            self.units[field['unitCode']] = self.naming.humanize_unit(field['unitCode'])
+        if 'data_relation' in field:
+            resource = field['data_relation']['resource']
+            self.types[resource] = self.naming.type(resource)
+            result['data_relation'] = {'resource': resource}
+        if 'schema' in field:
+            subschema = field['schema']
+            if field['type'] == 'list':
+                result['schema'] = self.field(subschema)
+            elif field['type'] == 'dict':
+                if hasattr(subschema, 'type_name'):
+                    result['schema'] = {'$type': subschema.type_name()}
+                else:
+                    result['schema'] = self.schema(subschema)
+        return result
+
+    def value(self, value):
+        """
+        Returns values that JSON represents as they are, and others as the text they are rendered with,
+        keeping the items of collections as the class diagram lists them.
+        """
+        if value is None or type(value) in (str, int, float, bool):
+            return value
+        if type(value) is dict and all(type(key) is str and self.value(element) is element
+                                       for key, element in value.items()):
+            return value
+        if isinstance(value, (list, tuple, set, frozenset)):
+            items = [element if self.value(element) is element else str(element) for element in value]
+            if type(value) is list and items == value:
+                return value
+            return {'$literal': str(value), '$items': items}
+        return {'$literal': str(value)}
+
+
+def load_config(config: dict) -> dict:
+    config = {key: load_value(value) for key, value in config.items()}
+    for settings in config['DOMAIN'].values():
+        for key in SETTINGS_KEYS:
+            if key in settings:
+                settings[key] = load_value(settings[key])
+        schema = settings['_schema']
+        settings['_schema'] = SchemaFactory(schema['type_name'], load_schema(schema['fields']))
+    return config
+
+
+def load_index(index: ClassIndex) -> ClassIndex:
+    index.fields = {name: load_schema(fields) for name, fields in index.fields.items()}
+    return index
+
+
+def load_schema(schema: dict) -> dict:
+    if '$type' in schema:
+        return TypedSchema(schema['$type'])
+    return {name: load_field(field) for name, field in schema.items()}
+
+
+def load_field(field: dict) -> dict:
+    field = {key: load_value(value) for key, value in field.items()}
+    if 'schema' in field:
+        field['schema'] = load_field(field['schema']) if field['type'] == 'list' else load_schema(field['schema'])
+    return field
+
+
+def load_value(value):
+    if type(value) is dict and '$items' in value:
+        return LiteralList(value['$items'], value['$literal'])
+    if type(value) is dict and '$literal' in value:
+        return Literal(value['$literal'])
+    return value
+
+
+def encode(value):
+    """
+    The inverse of the load functions: returns loaded settings, schemas and values as JSON.
+    """
+    if isinstance(value, TypedSchema):
+        return {'$type': value.type_name()}
+    if isinstance(value, LiteralList):
+        return {'$literal': value.text, '$items': list(value)}
+    if isinstance(value, Literal):
+        return {'$literal': str(value)}
+    if isinstance(value, SchemaFactory):
+        return {'type_name': value.type_name(), 'fields': encode(value.schema)}
+    if isinstance(value, dict):
+        return {key: encode(element) for key, element in value.items()}
+    if isinstance(value, list):
+        return [encode(element) for element in value]
+    return value
+
+
+def _open(path: str, mode: str):
+    if path.endswith('.gz'):
+        return gzip.open(path, mode, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+def _dump(record: dict, file):
+    json.dump(record, file, separators=(',', ':'))
+    file.write('\n')
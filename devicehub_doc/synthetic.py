@@ -0,0 +1,161 @@
+"""
+    A stand-in for a DeviceHub app and its RDFS class hierarchy, generated at any scale, so the
+    generators can be exercised without DeviceHub:
+
+        app = SyntheticApp(resources=100, fields=30, depth=2, enum_size=20)
+        ApiToRST(app, naming=app.naming)
+        ClassDiagram(rdfs=app.rdfs, naming=app.naming)
+
+    The classes are laid out under the base classes of :data:`devicehub_doc.class_diagram.PARTITIONS`,
+    so the default partitions apply. Apps with the same arguments are equal.
+"""
+import random
+
+BASE_CLASSES = (
+    # name, parent
+    ('Thing', 'RDFS'),
+    ('Product', 'Thing'),
+    ('Device', 'Product'),
+    ('Component', 'Device'),
+    ('Event', 'Thing'),
+    ('EventWithOneDevice', 'Event'),
+    ('EventWithDevices', 'Event'),
+    ('Place', 'Thing'),
+    ('Account', 'Thing'),
+    ('Benchmark', 'RDFS'),
+)
+"""The classes every synthetic hierarchy has, which the generated classes extend."""
+
+TYPES = 'string', 'integer', 'float', 'boolean', 'datetime', 'url'
+
+
+class SyntheticNaming:
+    """
+    The helpers of :class:`devicehub_doc.doc.DeviceHubNaming`, without DeviceHub.
+    """
+    write_roles = 'dh_allowed_write_roles'
+
+    @staticmethod
+    def type(resource: str) -> str:
+        return ''.join(word.capitalize() for word in resource.split('-'))
+
+    @staticmethod
+    def humanize_unit(code: str) -> str:
+        return 'Unit {}'.format(code)
+
+
+class SyntheticRDFS(dict):
+    """
+    Base of the synthetic hierarchies, with the interface of the RDFS of DeviceHub that the generators use.
+    Instantiating a class returns its schema.
+    """
+    _import_schemas = True
+    _fields = {}
+
+    def __init__(self, *_):
+        super().__init__(self.actual_fields())
+
+    @classmethod
+    def type_name(cls) -> str:
+        return cls.__name__
+
+    @classmethod
+    def actual_fields(cls) -> dict:
+        fields = {}
+        for ancestor in reversed(cls.__mro__):
+            fields.update(ancestor.__dict__.get('_fields', {}))
+        return fields
+
+    @classmethod
+    def subclasses(cls) -> list:
+        subclasses = []
+        for subclass in cls.__subclasses__():
+            subclasses.append(subclass)
+            subclasses.extend(subclass.subclasses())
+        return subclasses
+
+    @classmethod
+    def superclasses(cls, _):
+        if cls.__name__ == 'RDFS':
+            raise AttributeError('RDFS has no superclass.')
+        return cls.__mro__
+
+
+class SyntheticApp:
+    """
+    An app with a DOMAIN of `resources` resources, and the RDFS hierarchy of their classes in :attr:`rdfs`,
+    with the root and base classes by name in :attr:`classes`.
+
+    :param resources: The number of resources, each with its own class.
+    :param fields: The number of fields of every class, without counting the inner fields of dicts.
+    :param depth: How many levels of dict and list subschemas fields can nest.
+    :param enum_size: The number of values of the fields with `allowed`.
+    :param seed: Seed of the random choices.
+    """
+    def __init__(self, resources=50, fields=20, depth=2, enum_size=10, seed=0):
+        self.random = random.Random(seed)
+        self.naming = SyntheticNaming()
+        self.depth = depth
+        self.enum_size = enum_size
+        self.resource_names = ['resource-{}'.format(i) for i in range(resources)]
+        self.rdfs = type('RDFS', (SyntheticRDFS,), {'_fields': {
+            '@type': {'type': 'string', 'required': True, 'allowed': ['RDFS']},
+            'label': {'type': 'string', 'description': 'A short, descriptive title.'},
+        }})
+        # The hierarchy is found through __subclasses__, which only keeps weak references
+        self.classes = classes = {'RDFS': self.rdfs}
+        for name, parent in BASE_CLASSES:
+            classes[name] = type(name, (classes[parent],), {'_fields': self.schema(2, depth)})
+        domain = {}
+        base_names = [name for name, _ in BASE_CLASSES]
+        for resource_name in self.resource_names:
+            parent = classes[self.random.choice(base_names)]
+            cls = type(self.naming.type(resource_name), (parent,), {'_fields': self.schema(fields, depth)})
+            domain[resource_name] = {
+                '_schema': cls,
+                'url': resource_name,
+                'resource_methods': ['GET', 'POST'],
+                'item_methods': ['GET', 'PATCH', 'DELETE'],
+                'item_url': 'regex("[a-f0-9]{24}")',
+                'datasource': {'projection': {}},
+                'extra_response_fields': [],
+            }
+        self.config = {
+            'DOMAIN': domain,
+            'ID_FIELD': '_id',
+            'LAST_UPDATED': '_updated',
+            'DATE_CREATED': '_created',
+            'META': '_meta',
+            'ITEM_CACHE': 120,
+        }
+
+    def schema(self, size: int, depth: int) -> dict:
+        return {'field{}'.format(i): self.field(depth) for i in range(size)}
+
+    def field(self, depth: int) -> dict:
+        kind = self.random.randrange(10)
+        if kind == 0 and depth > 0:
+            field = {'type': 'dict', 'schema': self.schema(3, depth - 1)}
+        elif kind == 1 and depth > 0:
+            field = {'type': 'list', 'schema': {'type': 'dict', 'schema': self.schema(3, depth - 1)}}
+        elif kind == 2 and self.resource_names:
+            field = {'type': 'string', 'data_relation': {'resource': self.random.choice(self.resource_names)}}
+        elif kind == 3 and self.resource_names:
+            reference = {'type': 'string', 'data_relation': {'resource': self.random.choice(self.resource_names)}}
+            field = {'type': 'list', 'schema': reference}
+        elif kind == 4:
+            field = {'type': 'string', 'allowed': ['Value{}'.format(i) for i in range(self.enum_size)]}
+        elif kind == 5:
+            field = {'type': 'float', 'unitCode': 'C{}'.format(self.random.randrange(10))}
+        else:
+            field = {'type': self.random.choice(TYPES)}
+        field['description'] = 'Description of a synthetic field.'
+        if self.random.random() < 0.2:
+            field['required'] = True
+        if self.random.random() < 0.1:
+            field['readonly'] = True
+        elif self.random.random() < 0.1:
+            field['writeonly'] = True
+        if self.random.random() < 0.1:
+            field['sink'] = self.random.randint(-5, 5)
+        return field
@@ -0,0 +1,177 @@
+"""
+    Watch mode: the app is imported once and the modules of its schemas are polled. When one changes, it is
+    reloaded with the modules that use it, and only the sections of `api.rst` and the class diagrams of the
+    classes they redefine are generated again.
+
+    Classes are matched by type name, so changes to the fields of existing classes are applied. Adding or
+    removing classes, or changing the settings of resources (urls, methods...), needs a restart.
+"""
+import importlib
+import os
+import sys
+import traceback
+from time import perf_counter, sleep
+
+from devicehub_doc.api_rst import ApiToRST
+from devicehub_doc.class_diagram import PARTITIONS, ClassDiagram, devicehub_index
+
+MODULE_FILES = 'settings.py', 'schema.py'
+"""The endings of the names of the files of the modules defining resources and schemas."""
+
+
+class WatchedApiToRST(ApiToRST):
+    """
+    Keeps the section of every resource in memory, so :func:`update` only renders the given resources.
+    """
+    def __init__(self, app, **kwargs):
+        self.sections = {}
+        super().__init__(app, **kwargs)
+
+    def render_resource(self, key: str, settings: dict):
+        section = self.sections.get(key)
+        if section is None:
+            section = self.sections[key] = self.document_resource(key, settings)
+        return section,
+
+    def update(self, keys):
+        for key in keys:
+            self.sections.pop(key, None)
+        self.field_cache.clear()
+        self.write()
+
+
+class Watcher:
+    """
+    Generates `api.rst` and the divided class diagrams in `directory`, the home by default, and updates them
+    when the files of the `modules` change. By default, the modules are the imported settings and schemas of
+    the packages defining the schemas of the resources.
+    """
+    def __init__(self, app, directory: str = None, img_format='pdf', file_prefix='devicehub diagram',
+                 partitions=PARTITIONS, workers: int = None, cache_dir: str = None, naming=None, modules=None,
+                 max_enum_values=30, interval=0.2):
+        """
+        :param interval: The seconds between checks of the files.
+        """
+        self.app = app
+        self.directory = directory if directory is not None else os.path.expanduser('~')
+        self.img_format = img_format
+        self.file_prefix = file_prefix
+        self.partitions = partitions
+        self.workers = workers
+        self.cache_dir = cache_dir
+        self.naming = naming
+        self.max_enum_values = max_enum_values
+        self.interval = interval
+        self.index = devicehub_index()
+        if modules is None:
+            packages = {settings['_schema'].__module__.partition('.')[0] for settings in app.config['DOMAIN'].values()}
+            modules = [name for name, module in list(sys.modules.items())
+                       if name.partition('.')[0] in packages
+                       and (getattr(module, '__file__', None) or '').endswith(MODULE_FILES)]
+        self.modules = modules
+        self.api = WatchedApiToRST(app, output=os.path.join(self.directory, 'api.rst'), naming=naming)
+        self.diagram = self.generate_diagrams()
+
+    def generate_diagrams(self, only=None) -> ClassDiagram:
+        return ClassDiagram(img_format=self.img_format, file_prefix=self.file_prefix, workers=self.workers,
+                            partitions=self.partitions, cache_dir=self.cache_dir, naming=self.naming,
+                            directory=self.directory, index=self.index, only=only,
+                            max_enum_values=self.max_enum_values)
+
+    def watch(self):
+        """
+        Checks the files every :attr:`interval` seconds until interrupted.
+        """
+        print('Watching {} modules. Press Ctrl+C to stop.'.format(len(self.modules)))
+        modified = self.get_modified()
+        try:
+            while True:
+                sleep(self.interval)
+                current = self.get_modified()
+                changed = [name for name in self.modules if current.get(name) != modified.get(name)]
+                modified = current
+                if changed:
+                    try:
+                        self.update(changed)
+                    except Exception:
+                        # Files are often saved while being edited: keep watching
+                        traceback.print_exc()
+        except KeyboardInterrupt:
+            pass
+
+    def get_modified(self) -> dict:
+        modified = {}
+        for name in self.modules:
+            try:
+                modified[name] = os.stat(sys.modules[name].__file__).st_mtime_ns
+            except OSError:
+                pass
+        return modified
+
+    def update(self, changed: list):
+        """
+        Reloads the changed modules and the ones using them, and generates again what their classes affect.
+        """
+        start = perf_counter()
+        type_names = set()
+        for module in self.reload(changed):
+            for cls in vars(module).values():
+                if isinstance(cls, type) and cls.__module__ == module.__name__ and hasattr(cls, 'type_name') \
+                        and cls.type_name() in self.index.fields:
+                    type_names.add(self.replace_class(cls))
+        keys = [key for key, settings in self.app.config['DOMAIN'].items()
+                if settings['_schema'].type_name() in type_names]
+        self.api.update(keys)
+        groups = {self.diagram.groups[type_name] for type_name in type_names}
+        only = [partition.name for partition in self.partitions
+                if partition.name in groups or (None in groups and partition.base_classes)]
+        if only:
+            self.diagram = self.generate_diagrams(only)
+        print('Updated {} classes, {} resources and {} diagrams in {:.0f} ms.'.format(
+            len(type_names), len(keys), len(only), (perf_counter() - start) * 1000))
+
+    def reload(self, changed: list) -> list:
+        """
+        Reloads the changed modules and the watched modules that use their classes or functions, each one
+        after the modules it uses, so they get the reloaded versions.
+        :return: The reloaded modules.
+        """
+        uses = {name: {getattr(value, '__module__', None) for value in vars(sys.modules[name]).values()
+                       if callable(value)} - {name}
+                for name in self.modules}
+        names = set(changed)
+        grown = True
+        while grown:
+            dependents = {name for name in self.modules if name not in names and uses[name] & names}
+            names |= dependents
+            grown = bool(dependents)
+        reloaded, visited = [], set()
+        for name in self.modules:
+            if name not in names or name in visited:
+                continue
+            visited.add(name)
+            stack = [(name, iter(sorted(uses[name] & names)))]
+            while stack:
+                name, used = stack[-1]
+                following = next((used_name for used_name in used if used_name not in visited), None)
+                if following is None:
+                    stack.pop()
+                    reloaded.append(importlib.reload(sys.modules[name]))
+                else:
+                    visited.add(following)
+                    stack.append((following, iter(sorted(uses[following] & names))))
+        return reloaded
+
+    def replace_class(self, cls) -> str:
+        """
+        Replaces the class with the same type name in the index and the settings of the resources.
+        :return: The type name.
+        """
+        type_name = cls.type_name()
+        if type_name == self.index.root:
+            cls._import_schemas = False
+        self.index.fields[type_name] = cls.actual_fields()
+        for settings in self.app.config['DOMAIN'].values():
+            if settings['_schema'].type_name() == type_name:
+                settings['_schema'] = cls
+        return type_name
@@ -0,0 +1,32 @@
+import os
+import tempfile
+
+
+def write_atomic(chunks, output) -> int:
+    """
+    Streams the text chunks to `output`, which is either a path or a file object.
+
+    Paths are written through a temporary file in the same directory that then replaces the path,
+    so readers never see a half-written file.
+    :return: The number of bytes written, or of characters for text file objects.
+    """
+    if hasattr(output, 'write'):
+        return sum(output.write(chunk) for chunk in chunks)
+    directory, name = os.path.split(os.path.abspath(output))
+    fd, tmp_path = tempfile.mkstemp(prefix='.{}.'.format(name), suffix='.tmp', dir=directory)
+    try:
+        with open(fd, 'wb') as file:
+            written = sum(file.write(chunk.encode('utf-8')) for chunk in chunks)
+            file.flush()
+            os.fsync(file.fileno())
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_path, 0o666 & ~umask)  # mkstemp creates files only readable by the owner
+        os.replace(tmp_path, output)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    return written
@@ -12,5 +12,10 @@ setup(
     install_requires=[
         'graphviz'
     ],
-    include_package_data=True
+    include_package_data=True,
+    entry_points={
+        'console_scripts': [
+            'devicehub-doc = devicehub_doc.cli:main'
+        ]
+    }
 )
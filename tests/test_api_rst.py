@@ -0,0 +1,88 @@
+import io
+
+from devicehub_doc.api_rst import ApiToRST
+from devicehub_doc.synthetic import SyntheticApp, SyntheticNaming, SyntheticRDFS
+
+
+class RenamedUnits(SyntheticNaming):
+    @staticmethod
+    def humanize_unit(code: str) -> str:
+        return 'Renamed unit {}'.format(code)
+
+
+def render(app, **kwargs) -> str:
+    output = io.StringIO()
+    ApiToRST(app, output=output, **kwargs)
+    return output.getvalue()
+
+
+def test_cache_naming(tmpdir):
+    """Changing what the naming renders renders the sections again, though the schemas did not change."""
+    app = SyntheticApp(resources=5)
+    cache_dir = str(tmpdir)
+    render(app, cache_dir=cache_dir, naming=app.naming)
+    cached = ApiToRST(app, output=io.StringIO(), cache_dir=cache_dir, naming=app.naming)
+    assert cached.cache.misses == 0
+    doc = render(app, cache_dir=cache_dir, naming=RenamedUnits())
+    assert 'Renamed unit' in doc
+    assert doc == render(app, naming=RenamedUnits())
+
+
+class Thing(SyntheticRDFS):
+    _fields = {
+        '@type': {'type': 'string', 'required': True, 'allowed': ['Thing']},
+        'label': {'type': 'string', 'description': 'A short, descriptive title.'},
+    }
+
+
+class Device(Thing):
+    _fields = {
+        'hid': {'type': 'hid', 'unique': True, 'sink': 2},
+        'weight': {'type': 'float', 'unitCode': 'KGM'},
+        'components': {'type': 'list', 'schema': {'type': 'string', 'data_relation': {'resource': 'component'}}},
+        'pid': {'type': 'string', 'writeonly': True},
+    }
+
+
+class Component(Device):
+    _fields = {
+        'parent': {'type': 'string', 'data_relation': {'resource': 'device'}, 'readonly': True},
+        'tests': {'type': 'list', 'schema': {'type': 'dict', 'schema': {
+            'success': {'type': 'boolean', 'required': True},
+            'elapsed': {'type': 'integer', 'sink': -1},
+        }}},
+    }
+
+
+class Place(Thing):
+    _fields = {
+        'address': {'type': 'dict', 'schema': {'city': {'type': 'string'}, 'zip': {'type': 'string'}}},
+        'devices': {'type': 'list', 'schema': {'type': 'string', 'data_relation': {'resource': 'device'}}},
+    }
+
+
+class PicklableApp:
+    """An app whose schemas are classes of a module, so it can be rendered in processes."""
+    def __init__(self):
+        domain = {}
+        for schema in Device, Component, Place, Thing:
+            resource = schema.__name__.lower()
+            domain[resource] = {
+                '_schema': schema,
+                'url': resource + 's',
+                'resource_methods': ['GET', 'POST'],
+                'item_methods': ['GET', 'PATCH', 'DELETE'],
+                'extra_response_fields': ['label'],
+            }
+        self.config = {'DOMAIN': domain, 'ID_FIELD': '_id', 'LAST_UPDATED': '_updated',
+                       'DATE_CREATED': '_created', 'META': '_meta', 'ITEM_CACHE': 120}
+
+
+def test_concurrent_output():
+    """Rendering in threads or processes writes the same document as rendering serially."""
+    app = PicklableApp()
+    naming = SyntheticNaming()
+    doc = render(app, naming=naming)
+    assert doc.index('Component\n') < doc.index('Device\n') < doc.index('Place\n') < doc.index('Thing\n')
+    assert render(app, naming=naming, workers=3) == doc
+    assert render(app, naming=naming, workers=3, processes=True) == doc
@@ -0,0 +1,42 @@
+from devicehub_doc.diff import diff, format_changes
+from devicehub_doc.synthetic import SyntheticNaming, SyntheticRDFS
+
+STRING = {'type': 'string'}
+INTEGER = {'type': 'integer'}
+
+
+class App:
+    def __init__(self, fields: dict):
+        schema = type('Device', (SyntheticRDFS,), {'_fields': fields})
+        self.config = {'DOMAIN': {'devices': {
+            '_schema': schema,
+            'url': 'devices',
+            'resource_methods': ['POST'],
+            'item_methods': [],
+        }}}
+
+
+def changes(old: dict, new: dict) -> set:
+    naming = SyntheticNaming()
+    return {(change.field, change.action) for change in diff(App(old), App(new), naming, naming)}
+
+
+def test_rename():
+    assert changes({'a': STRING, 'b': INTEGER}, {'a2': STRING, 'b': INTEGER}) == {('a', 'removed'),
+                                                                                  ('a2', 'added')}
+
+
+def test_swap():
+    assert changes({'a': STRING, 'b': STRING}, {'b': STRING, 'c': STRING}) == {('a', 'removed'), ('c', 'added')}
+
+
+def test_reorder():
+    assert changes({'a': STRING, 'b': INTEGER}, {'b': INTEGER, 'a': STRING}) == set()
+
+
+def test_attribute():
+    naming = SyntheticNaming()
+    result = diff(App({'a': STRING}), App({'a': dict(STRING, required=True)}), naming, naming)
+    assert [(change.field, change.attribute, change.new) for change in result] == [('a', 'Required', True)]
+    assert format_changes(result) == '## devices\n\n- `POST devices`: field `a`: Required changed from ' \
+                                     '`None` to `True`.\n'
@@ -0,0 +1,51 @@
+import pytest
+
+from devicehub_doc.doc import Doc
+from devicehub_doc.model import EmptyError, ModelBuilder
+from devicehub_doc.synthetic import SyntheticNaming
+
+SCHEMA = {
+    'a': {'type': 'string'},
+    'b': {'type': 'dict', 'schema': {
+        'c': {'type': 'integer'},
+        'd': {'type': 'dict', 'schema': {'e': {'type': 'boolean'}}},
+    }},
+    'f': {'type': 'string', 'data_relation': {'resource': 'a-device'}},
+    'g': {'type': 'list', 'schema': {'type': 'dict', 'schema': {
+        'h': {'type': 'string'},
+        'i': {'type': 'list', 'schema': {'type': 'string', 'data_relation': {'resource': 'place'}}},
+    }}},
+    'j': {'type': 'float', 'unitCode': 'KGM'},
+}
+
+
+def test_order():
+    """Inner fields follow their parent with dotted names, depth first and in the order of the schemas."""
+    fields = Doc(SyntheticNaming()).get_fields(SCHEMA)
+    assert [field.name for field in fields] == ['a', 'b', 'b.c', 'b.d', 'b.d.e', 'f', 'g', 'g.h', 'g.i', 'j']
+    assert [(field.type, field.reference) for field in fields if field.reference is not None] == [
+        ('string', 'ADevice'), ('list', 'Place')]
+    assert fields[-1].unit_code == 'Unit KGM (KGM)'
+
+
+def test_inner_field_left_out():
+    """A read-only inner field is left out of POST, and so is the field containing it."""
+    schema = {'a': {'type': 'string'},
+              'b': {'type': 'dict', 'schema': {'c': {'type': 'string'}, 'd': {'type': 'string', 'readonly': True}}}}
+    builder = ModelBuilder(SyntheticNaming())
+    with pytest.raises(EmptyError):
+        builder.get_field('b', schema['b'], method='POST', schema_name='Thing', settings={})
+    assert [field.name for field in builder.get_field('b', schema['b'], method='GET', schema_name='Thing',
+                                                      settings={})] == ['b', 'b.c', 'b.d']
+
+
+def test_deep_schema():
+    """Schemas deeper than the recursion limit are flattened."""
+    schema = leaf = {'type': 'dict', 'schema': {}}
+    for _ in range(3000):
+        inner = {'type': 'dict', 'schema': {}}
+        leaf['schema']['x'] = inner
+        leaf = inner
+    fields = Doc(SyntheticNaming()).get_field('x', schema)
+    assert len(fields) == 3001
+    assert fields[-1].name == '.'.join(['x'] * 3001)
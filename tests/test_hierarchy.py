@@ -0,0 +1,65 @@
+from devicehub_doc.hierarchy import ClassIndex
+
+PARENTS = {
+    'RDFS': None,
+    'Thing': 'RDFS',
+    'Device': 'Thing',
+    'Computer': 'Device',
+    'Mobile': 'Device',
+    'Component': 'Device',
+    'RamModule': 'Component',
+    'HardDrive': 'Component',
+    'Processor': 'Component',
+    'Event': 'Thing',
+    'Add': 'Event',
+    'Remove': 'Event',
+    'Place': 'Thing',
+    'Benchmark': 'RDFS',
+}
+REFERENCES = {'Add': ['Device'], 'Place': ['Device'], 'HardDrive': ['Benchmark']}
+
+
+def index(parents: dict) -> ClassIndex:
+    ancestors = {}
+    for name in parents:
+        ancestors[name] = [name]
+        while parents[ancestors[name][-1]] is not None:
+            ancestors[name].append(parents[ancestors[name][-1]])
+    return ClassIndex(next(iter(parents)), list(parents), parents, ancestors, dict.fromkeys(parents, {}))
+
+
+def check(partitions, classes, max_size: int, sizes: dict):
+    members = [name for partition in partitions for name in partition.members]
+    assert sorted(members) == sorted(classes), 'Every class is in exactly one partition'
+    for partition in partitions:
+        assert sum(sizes[name] for name in partition.members) <= max_size or len(partition.members) == 1
+
+
+def test_split():
+    classes = index(PARENTS)
+    sizes = dict.fromkeys(PARENTS, 1)
+    for max_size in range(1, len(PARENTS) + 2):
+        check(classes.split(REFERENCES, max_size), PARENTS, max_size, sizes)
+    sizes = {name: 1 + len(name) % 4 for name in PARENTS}
+    sizes['Computer'] = 20  # Bigger than any budget: it is drawn alone
+    for max_size in range(1, 25):
+        partitions = classes.split(REFERENCES, max_size, sizes)
+        check(partitions, PARENTS, max_size, sizes)
+        assert any(partition.members == ('Computer',) for partition in partitions) or max_size >= 20
+
+
+def test_whole_hierarchy():
+    assert [partition.members for partition in index(PARENTS).split(REFERENCES, len(PARENTS))] == [
+        tuple(PARENTS)]
+
+
+def test_components():
+    """Components that fit are kept whole, also when they are joined by references only."""
+    parents = {'A': None, 'A1': 'A', 'A2': 'A', 'B': None, 'B1': 'B', 'C': None, 'C1': 'C', 'C2': 'C1'}
+    sizes = dict.fromkeys(parents, 1)
+    partitions = index(parents).split({'B1': ['C2']}, 5)
+    check(partitions, parents, 5, sizes)
+    assert [set(partition.members) for partition in partitions] == [{'A', 'A1', 'A2'},
+                                                                    {'B', 'B1', 'C', 'C1', 'C2'}]
+    partitions = index(parents).split({}, 3)
+    assert [partition.members for partition in partitions] == [('A', 'A1', 'A2'), ('B', 'B1'), ('C', 'C1', 'C2')]
@@ -0,0 +1,22 @@
+import io
+import json
+
+from devicehub_doc.model import Model
+from devicehub_doc.openapi import ApiToOpenAPI
+from devicehub_doc.synthetic import SyntheticApp
+
+
+def test_put():
+    """PUT takes the fields of the resource in its body, and answers with the fields python-eve adds."""
+    app = SyntheticApp(resources=1, depth=0)
+    settings = app.config['DOMAIN']['resource-0']
+    settings['item_methods'] = ['GET', 'PUT']
+    model = Model.from_app(app, naming=app.naming)
+    endpoint = next(endpoint for endpoint in model.resources['resource-0'].endpoints if endpoint.method == 'PUT')
+    output = io.StringIO()
+    ApiToOpenAPI(model, output)
+    operation = json.loads(output.getvalue())['paths']['/{database}/resource-0/{_id}']['put']
+    body = operation['requestBody']['content']['application/json']['schema']['properties']
+    assert endpoint.fields and list(body) == [field.name for field in endpoint.fields]
+    response = operation['responses']['200']['content']['application/json']['schema']['properties']
+    assert set(response) == {'_updated', '_created', '_id', '_links'}